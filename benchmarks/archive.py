@@ -0,0 +1,77 @@
+"""压缩与清理已滚动的分段时写入一行日志的延迟
+
+每种配置都写入相同的行并频繁滚动; ``inline`` 在写入的线程中同步压缩, 作为对照.
+
+    python benchmarks/archive.py [--lines 200000] [--max-file-size 262144]
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import (
+    List,
+    Optional,
+)
+
+from arkologger._archive import Archiver
+from arkologger._file import FileIO
+
+
+class InlineArchiver(Archiver):
+    """在调用方的线程中完成压缩与清理"""
+
+    def submit(self, directory: Path) -> None:
+        self.process(directory)
+
+
+def measure(
+    directory: Path, archiver: Optional[Archiver], lines: int, max_file_size: int
+) -> List[float]:
+    """返回每次写入的耗时(微秒)"""
+    file = FileIO(directory.joinpath("debug.log"), max_file_size, archiver)
+    line = f"[2024-01-01 00:00:00] INFO     {'message ' * 16}  module.path 123\n"
+    samples = []
+    for _ in range(lines):
+        started = time.perf_counter()
+        file.write(line)
+        file.flush()
+        samples.append((time.perf_counter() - started) * 1000000)
+    file.close()
+    if archiver is not None:
+        archiver.close()
+    return samples
+
+
+def percentile(samples: List[float], ratio: float) -> float:
+    return samples[min(int(len(samples) * ratio), len(samples) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=200000)
+    parser.add_argument("--max-file-size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    cases = (
+        ("none", None),
+        ("gzip", Archiver("gzip", max_count=20)),
+        ("lzma", Archiver("lzma", max_count=20)),
+        ("lzma inline", InlineArchiver("lzma", max_count=20)),
+    )
+    print(f"{'compression':<12} {'p50':>8} {'p99':>8} {'p99.9':>8} {'max':>10}  (us)")
+    for name, archiver in cases:
+        with tempfile.TemporaryDirectory() as root:
+            samples = sorted(
+                measure(Path(root), archiver, args.lines, args.max_file_size)
+            )
+            print(
+                f"{name:<12} {statistics.median(samples):8.1f}"
+                f" {percentile(samples, 0.99):8.1f} {percentile(samples, 0.999):8.1f}"
+                f" {samples[-1]:10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
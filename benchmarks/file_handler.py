@@ -0,0 +1,57 @@
+"""FileHandler 每秒写入的记录数
+
+记录直接交给 FileHandler.handle, 不经过 Logger; 文件写入临时目录, 不限制大小.
+`long message` 的消息超过一行的宽度, 需要折行.
+
+    python benchmarks/file_handler.py [--records 3000] [--repeat 5]
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from arkologger import FileHandler
+
+MESSAGES = (
+    ("short message", "request %s finished in %d ms"),
+    ("long message", "request %s finished in %d ms; " + "payload " * 40),
+)
+
+
+def measure(handler: FileHandler, message: str, records: int) -> float:
+    """返回每秒处理的记录数"""
+    started = time.perf_counter()
+    for i in range(records):
+        record = logging.LogRecord(
+            "bench", logging.INFO, __file__, 1, message, (i, i % 100), None
+        )
+        handler.handle(record)
+    handler.flush()
+    return records / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        handler = FileHandler(path=Path(root) / "debug.log", width=180)
+        for name, message in MESSAGES:
+            measure(handler, message, max(args.records // 10, 1))
+            samples = [
+                measure(handler, message, args.records) for _ in range(args.repeat)
+            ]
+            print(
+                f"{name:<14} median {statistics.median(samples):10.0f} records/s"
+                f"  max {max(samples):10.0f}"
+            )
+        handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""高亮关键字的耗时
+
+对同一条消息渲染 Handler._render_message, 除默认关键字外再分别加入 0、10、100 个关键字.
+记录的 highlighter 设为 None, 测得的时间只包含创建 Text 与高亮关键字;
+`no keywords` 一行不高亮任何关键字, 作为对照.
+
+    python benchmarks/keywords.py [--number 20000] [--repeat 5]
+"""
+
+import argparse
+import logging
+import statistics
+import time
+from typing import (
+    List,
+    Tuple,
+)
+
+from arkologger import Handler
+
+MESSAGE = (
+    "user keyword_003 requested /api/v1/items?page=2 from 10.0.0.1, "
+    "cache miss for keyword_042, fallback to database in 12 ms"
+)
+
+
+def measure(handler: Handler, number: int) -> float:
+    """返回每次渲染的平均耗时(微秒)"""
+    record = logging.LogRecord("bench", logging.INFO, __file__, 1, MESSAGE, None, None)
+    record.highlighter = None
+    # noinspection PyProtectedMember
+    render = handler._render_message  # pylint: disable=W0212
+    started = time.perf_counter()
+    for _ in range(number):
+        render(record, MESSAGE)
+    return (time.perf_counter() - started) / number * 1000000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases: List[Tuple[str, List[str]]] = [("no keywords", [])]
+    for count in (0, 10, 100):
+        extra = [f"keyword_{i:03d}" for i in range(count)]
+        cases.append((f"{count} extra keywords", Handler.KEYWORDS + extra))
+    print(f"message length: {len(MESSAGE)}")
+    for name, keywords in cases:
+        handler = Handler()
+        handler.render_keywords = keywords
+        measure(handler, max(args.number // 10, 1))
+        samples = [measure(handler, args.number) for _ in range(args.repeat)]
+        print(
+            f"{name:<20} median {statistics.median(samples):8.2f} us"
+            f"  min {min(samples):8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
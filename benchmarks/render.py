@@ -0,0 +1,67 @@
+"""渲染一条记录的耗时
+
+INFO 记录由控制台与 debug.log 两个 handler 处理, ERROR 记录由控制台、debug.log 与 error.log 三个 handler 处理.
+控制台的输出被写入 os.devnull.
+
+    python benchmarks/render.py [--records 2000] [--repeat 5]
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+from arkologger import (
+    Handler,
+    Logger,
+    LoggerConfig,
+)
+
+
+def measure(logger: Logger, level: int, records: int, exc_info: bool) -> float:
+    """返回每条记录的平均耗时(微秒)"""
+    started = time.perf_counter()
+    for i in range(records):
+        if exc_info:
+            try:
+                raise ValueError(i)
+            except ValueError:
+                logger.log(level, "message %s", i, exc_info=True)
+        else:
+            logger.log(level, "message %s", i)
+    return (time.perf_counter() - started) / records * 1000000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root, open(os.devnull, "w") as devnull:
+        logger = Logger(LoggerConfig(project_root=root, width=180))
+        for handler in logger.handlers:
+            if type(handler) is Handler:  # pylint: disable=C0123
+                handler.console.file = devnull
+        cases = (
+            ("INFO (2 sinks)", logging.INFO, args.records, False),
+            ("ERROR (3 sinks)", logging.ERROR, args.records, False),
+            ("ERROR + traceback (3 sinks)", logging.ERROR, args.records // 20, True),
+        )
+        for name, level, records, exc_info in cases:
+            measure(logger, level, max(records // 10, 1), exc_info)
+            samples = [
+                measure(logger, level, records, exc_info) for _ in range(args.repeat)
+            ]
+            print(
+                f"{name:<28} median {statistics.median(samples):8.1f} us/record"
+                f"  min {min(samples):8.1f}"
+            )
+        for handler in logger.handlers:
+            handler.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,53 @@
-from arkologger._config import LoggerConfig
-from arkologger._handler import *
-from arkologger._logger import (
-    LogFilter,
-    Logger,
+from importlib import import_module
+from typing import (
+    Any,
+    List,
+    TYPE_CHECKING,
 )
+
+if TYPE_CHECKING:
+    from arkologger._binary import (  # pylint: disable=unused-import
+        BinaryFileHandler,
+        read_binary_log,
+    )
+    from arkologger._config import LoggerConfig  # pylint: disable=unused-import
+    from arkologger._handler import *  # pylint: disable=unused-import
+    from arkologger._json import JSONFileHandler  # pylint: disable=unused-import
+    from arkologger._logger import (  # pylint: disable=unused-import
+        LazyLogger,
+        LogFilter,
+        Logger,
+    )
+    from arkologger._ring import read_ring_buffer  # pylint: disable=unused-import
+
+# 导出的名称与其所在的模块; 模块在第一次访问该名称时才被导入
+_LAZY_ATTRIBUTES = {
+    "BinaryFileHandler": "arkologger._binary",
+    "read_binary_log": "arkologger._binary",
+    "LoggerConfig": "arkologger._config",
+    "LogRender": "arkologger._handler",
+    "Handler": "arkologger._handler",
+    "PlainTextHandler": "arkologger._handler",
+    "FileHandler": "arkologger._handler",
+    "RingBufferHandler": "arkologger._handler",
+    "get_module_path": "arkologger._handler",
+    "JSONFileHandler": "arkologger._json",
+    "LazyLogger": "arkologger._logger",
+    "LogFilter": "arkologger._logger",
+    "Logger": "arkologger._logger",
+    "read_ring_buffer": "arkologger._ring",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _LAZY_ATTRIBUTES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,83 @@
+import argparse
+import logging
+import sys
+from typing import (
+    List,
+    Optional,
+    TYPE_CHECKING,
+)
+
+from arkologger._binary import (
+    BinaryRecord,
+    read_binary_log,
+)
+
+if TYPE_CHECKING:
+    from logging import LogRecord  # pylint: disable=unused-import
+
+
+def _to_log_record(record: BinaryRecord) -> "LogRecord":
+    levelno = logging.getLevelName(record.level)
+    message = record.message
+    if record.exception:
+        message = f"{message}\n{record.exception.rstrip()}"
+    return logging.makeLogRecord(
+        {
+            "name": record.name,
+            "levelname": record.level,
+            "levelno": levelno if isinstance(levelno, int) else 0,
+            "created": record.created,
+            "msecs": record.created % 1 * 1000,
+            "lineno": record.lineno,
+            "msg": message,
+            "module_path": record.path,
+        }
+    )
+
+
+def decode(args: argparse.Namespace) -> None:
+    records = (record for path in args.paths for record in read_binary_log(path))
+    if args.format == "json":
+        import msgspec
+
+        encoder = msgspec.json.Encoder()
+        output = sys.stdout.buffer
+        for record in records:
+            output.write(encoder.encode(record._asdict()))
+            output.write(b"\n")
+        output.flush()
+        return
+
+    from arkologger._handler import Handler
+
+    class DecodeHandler(Handler):
+        def get_path(self, record: "LogRecord") -> str:
+            return record.module_path
+
+    handler = DecodeHandler(width=args.width, log_time_format=args.time_format)
+    handler.setFormatter(logging.Formatter("%(message)s", args.time_format))
+    for record in records:
+        handler.handle(_to_log_record(record))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m arkologger")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    decode_parser = subparsers.add_parser("decode", help="还原二进制日志文件")
+    decode_parser.add_argument("paths", nargs="+", help="二进制日志文件或已压缩的分段")
+    decode_parser.add_argument(
+        "-f", "--format", choices=["rich", "json"], default="rich", help="输出格式"
+    )
+    decode_parser.add_argument("-w", "--width", type=int, default=None, help="输出宽度")
+    decode_parser.add_argument(
+        "--time-format", default="[%Y-%m-%d %X]", help="时间格式"
+    )
+    decode_parser.set_defaults(func=decode)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
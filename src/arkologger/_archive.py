@@ -0,0 +1,153 @@
+import atexit
+import gzip
+import lzma
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import SimpleQueue
+from typing import (
+    Callable,
+    Dict,
+    IO,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
+
+from arkologger._file import SEGMENT_PATTERN
+
+__all__ = ["Archiver"]
+
+CompressionType = Literal["gzip", "lzma"]
+
+# 压缩时每次读取的字节数
+CHUNK_SIZE = 64 * 1024
+
+COMPRESSORS: Dict[str, Tuple[str, Callable[..., IO[bytes]]]] = {
+    "gzip": (".gz", gzip.open),
+    "lzma": (".xz", lzma.open),
+}
+
+
+class Archiver:
+    """在后台线程中压缩已滚动的日志分段, 并按数量、时间与总大小清理旧分段
+
+    Args:
+        compression (str, optional): 压缩算法, 可选 ``gzip`` 与 ``lzma``; 若为 None , 则不压缩.
+        max_count (int, optional): 每个目录最多保留的分段数量.
+        max_days (int, optional): 分段最多保留的天数.
+        max_size (int, optional): 每个目录中分段的最大总字节数.
+    """
+
+    def __init__(
+        self,
+        compression: Optional[CompressionType] = None,
+        max_count: Optional[int] = None,
+        max_days: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        if compression is not None and compression not in COMPRESSORS:
+            raise ValueError(f"不支持的压缩算法: {compression}")
+        self.compression = compression
+        self.max_count = max_count
+        self.max_days = max_days
+        self.max_size = max_size
+        self._queue: "SimpleQueue[Optional[Path]]" = SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, directory: Path) -> None:
+        """将目录加入后台处理队列, 调用方不会等待压缩与清理完成"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="arko-logger-archiver", daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+        self._queue.put(directory)
+
+    def close(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        if sys.platform.startswith("linux"):
+            # Linux 上可以单独降低线程的优先级, 使压缩尽量不与写入日志的线程争抢 CPU
+            # noinspection PyBroadException
+            try:
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+            except Exception:  # pylint: disable=W0703
+                pass
+        while (directory := self._queue.get()) is not None:
+            # noinspection PyBroadException
+            try:
+                self.process(directory)
+            except Exception:  # pylint: disable=W0703
+                continue
+
+    def process(self, directory: Path) -> None:
+        segments = self._segments(directory)
+        if self.compression is not None:
+            segments = [self._compress(path) for path in segments]
+        self._apply_retention(segments)
+
+    @staticmethod
+    def _segments(directory: Path) -> List[Path]:
+        result: List[Tuple[str, int, Path]] = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if (match := SEGMENT_PATTERN.match(entry.name)) is not None:
+                    result.append(
+                        (match.group(1), int(match.group(2) or 0), Path(entry.path))
+                    )
+        # 由旧到新排序
+        return [path for *_, path in sorted(result)]
+
+    def _compress(self, path: Path) -> Path:
+        suffix, opener = COMPRESSORS[self.compression]
+        if path.suffix in (".gz", ".xz"):
+            return path
+        target = path.with_name(path.name + suffix)
+        temp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            with path.open("rb") as source, opener(temp, "wb") as file:
+                while chunk := source.read(CHUNK_SIZE):
+                    file.write(chunk)
+                    # 每压缩一块便让出 GIL
+                    time.sleep(0)
+            shutil.copystat(path, temp)
+            os.replace(temp, target)
+            path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            # 多进程时该分段可能已被其他进程处理
+            temp.unlink(missing_ok=True)
+        return target
+
+    def _apply_retention(self, segments: List[Path]) -> None:
+        stats = []
+        for path in segments:
+            try:
+                stats.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        removed = set()
+        if self.max_days is not None:
+            deadline = time.time() - self.max_days * 86400
+            removed.update(i for i, (_, s) in enumerate(stats) if s.st_mtime < deadline)
+        if self.max_count is not None:
+            removed.update(range(max(len(stats) - self.max_count, 0)))
+        if self.max_size is not None:
+            total = sum(s.st_size for i, (_, s) in enumerate(stats) if i not in removed)
+            for i, (_, stat) in enumerate(stats):
+                if total <= self.max_size:
+                    break
+                if i not in removed:
+                    removed.add(i)
+                    total -= stat.st_size
+        for i in removed:
+            stats[i][0].unlink(missing_ok=True)
@@ -0,0 +1,136 @@
+import logging
+from queue import (
+    Empty,
+    Full,
+    Queue,
+)
+from threading import (
+    Lock,
+    Thread,
+)
+from typing import (
+    Iterable,
+    List,
+    Literal,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from logging import LogRecord  # pylint: disable=unused-import
+
+__all__ = ["AsyncHandler"]
+
+OverflowPolicy = Literal["block", "drop_oldest", "drop_newest"]
+
+_STOP = object()
+
+
+class AsyncHandler(logging.Handler):
+    """在后台线程中处理日志记录
+
+    调用方线程只负责将记录放入有界队列, 格式化、渲染与写入都由工作线程交给 ``handlers`` 完成.
+
+    Args:
+        handlers (Iterable[logging.Handler]): 实际处理记录的 handler.
+        queue_size (int): 队列的最大长度.
+        overflow (str): 队列已满时的策略; ``block`` 为等待, ``drop_oldest`` 为丢弃最旧的记录,
+            ``drop_newest`` 为丢弃新记录.
+        workers (int): 工作线程的数量.
+    """
+
+    def __init__(
+        self,
+        handlers: Iterable[logging.Handler],
+        queue_size: int = 10000,
+        overflow: OverflowPolicy = "block",
+        workers: int = 1,
+    ) -> None:
+        self.handlers: List[logging.Handler] = list(handlers)
+        super().__init__(level=min(i.level for i in self.handlers))
+        if overflow not in ("block", "drop_oldest", "drop_newest"):
+            raise ValueError(f"不支持的溢出策略: {overflow}")
+        self.overflow = overflow
+        self.queue: "Queue" = Queue(maxsize=queue_size)
+        self.dropped_oldest = 0
+        self.dropped_newest = 0
+        self._drop_lock = Lock()
+        self._workers = [
+            Thread(target=self._run, name=f"arko-logger-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    @property
+    def dropped(self) -> int:
+        return self.dropped_oldest + self.dropped_newest
+
+    @staticmethod
+    def prepare(record: "LogRecord") -> "LogRecord":
+        # 参数可能在记录被处理前被修改, 因此在调用方线程中完成格式化
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def handle(self, record: "LogRecord") -> bool:
+        # 入队本身是线程安全的, 不需要持有 handler 的锁
+        rv = self.filter(record)
+        if rv:
+            self.emit(record)
+        return rv
+
+    def emit(self, record: "LogRecord") -> None:
+        record = self.prepare(record)
+        try:
+            self.queue.put_nowait(record)
+            return
+        except Full:
+            pass
+        if self.overflow == "block":
+            self.queue.put(record)
+        elif self.overflow == "drop_newest":
+            with self._drop_lock:
+                self.dropped_newest += 1
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(record)
+                    break
+                except Full:
+                    try:
+                        self.queue.get_nowait()
+                    except Empty:
+                        continue
+                    self.queue.task_done()
+                    with self._drop_lock:
+                        self.dropped_oldest += 1
+
+    def _run(self) -> None:
+        while (record := self.queue.get()) is not _STOP:
+            try:
+                for handler in self.handlers:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            except Exception:  # pylint: disable=W0703
+                self.handleError(record)
+            finally:
+                self.queue.task_done()
+        self.queue.task_done()
+
+    def flush(self) -> None:
+        """等待队列中的记录全部处理完毕"""
+        if any(worker.is_alive() for worker in self._workers):
+            self.queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self) -> None:
+        if any(worker.is_alive() for worker in self._workers):
+            for _ in self._workers:
+                self.queue.put(_STOP)
+            for worker in self._workers:
+                worker.join()
+        for handler in self.handlers:
+            handler.flush()
+        super().close()
@@ -0,0 +1,193 @@
+import gzip
+import logging
+import lzma
+import os
+import struct
+import traceback as traceback_
+from pathlib import Path
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TYPE_CHECKING,
+    Tuple,
+    Union,
+)
+
+from arkologger._file import FileIO
+from arkologger._handler import get_module_path
+
+if TYPE_CHECKING:
+    from arkologger._archive import Archiver  # pylint: disable=unused-import
+    from logging import LogRecord  # pylint: disable=unused-import
+
+__all__ = ["BinaryFileHandler", "BinaryRecord", "read_binary_log"]
+
+# 每个分段以 MAGIC 开头, 随后是若干帧: 帧长度(u32) + 帧类型(u8) + 内容
+MAGIC = b"ARKOBIN\x01"
+FRAME = struct.Struct("<IB")
+# 字符串帧: 编号(u32) + utf-8 字符串
+KIND_STRING = 1
+STRING = struct.Struct("<I")
+# 记录帧: 微秒时间戳(i64) + 等级/名称/路径的字符串编号(u32) + 行号(u32) + 消息长度(u32) + 消息 + 异常文本
+KIND_RECORD = 2
+RECORD = struct.Struct("<qIIIII")
+# 写入者帧: 进程号(u32); 多进程模式下每次写入都以该帧开头, 之后的字符串编号属于该进程
+KIND_OWNER = 3
+OWNER = struct.Struct("<I")
+
+
+class BinaryRecord(NamedTuple):
+    created: float
+    level: str
+    name: str
+    path: str
+    lineno: int
+    message: str
+    exception: Optional[str]
+
+
+class BinaryFileHandler(logging.Handler):
+    """以紧凑的二进制格式写入记录的 handler
+
+    等级、logger 名称与路径在每个分段中只写入一次, 之后只引用其编号; 可以通过 ``python -m arkologger decode`` 还原.
+    多进程模式下各进程维护各自的字符串表, 并以写入者帧区分各自的编号.
+    """
+
+    def __init__(
+        self,
+        *args,
+        path: Path,
+        max_file_size: Optional[int] = None,
+        archiver: Optional["Archiver"] = None,
+        project_root: Union[str, Path] = os.getcwd(),
+        multiprocess: bool = False,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.project_root = project_root
+        # 字符串表与文件一一对应, 因此不能使用写入缓冲
+        self.file = FileIO(
+            path, max_file_size, archiver, multiprocess=multiprocess, header=MAGIC
+        )
+        self._multiprocess = multiprocess
+        self._owner = os.getpid()
+        self._generation = 0
+        self._strings: Dict[str, int] = {}
+
+    def _intern(self, value: str, chunks: List[bytes]) -> int:
+        if (index := self._strings.get(value)) is None:
+            index = self._strings[value] = len(self._strings)
+            data = value.encode("utf-8")
+            chunks.append(FRAME.pack(STRING.size + len(data), KIND_STRING))
+            chunks.append(STRING.pack(index))
+            chunks.append(data)
+        return index
+
+    def encode(self, record: "LogRecord") -> Callable[[int], bytes]:
+        """返回生成记录内容的函数; 字符串表在确定了写入的文件之后才会被使用"""
+        values = (
+            record.levelname,
+            record.name,
+            get_module_path(record.pathname, self.project_root),
+        )
+        message = record.getMessage().encode("utf-8")
+        exception = b""
+        if record.exc_info and record.exc_info[0] is not None:
+            exception = "".join(traceback_.format_exception(*record.exc_info)).encode(
+                "utf-8"
+            )
+
+        def render(generation: int) -> bytes:
+            chunks: List[bytes] = []
+            if generation != self._generation:
+                # 新的分段需要重新建立字符串表
+                self._generation = generation
+                self._strings.clear()
+            if self._multiprocess:
+                if (owner := os.getpid()) != self._owner:
+                    # fork 得到的子进程不能沿用父进程的字符串表
+                    self._owner = owner
+                    self._strings.clear()
+                chunks.append(FRAME.pack(OWNER.size, KIND_OWNER))
+                chunks.append(OWNER.pack(owner))
+            level, name, path = (self._intern(value, chunks) for value in values)
+            chunks.append(
+                FRAME.pack(RECORD.size + len(message) + len(exception), KIND_RECORD)
+            )
+            chunks.append(
+                RECORD.pack(
+                    int(record.created * 1000000),
+                    level,
+                    name,
+                    path,
+                    record.lineno,
+                    len(message),
+                )
+            )
+            chunks.append(message)
+            chunks.append(exception)
+            return b"".join(chunks)
+
+        return render
+
+    def emit(self, record: "LogRecord") -> None:
+        # noinspection PyBroadException
+        try:
+            self.file.write_with(self.encode(record))
+        except Exception:  # pylint: disable=W0703
+            self.handleError(record)
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def _open(path: Path) -> BinaryIO:
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    if path.suffix == ".xz":
+        return lzma.open(path, "rb")
+    return path.open("rb")
+
+
+def read_binary_log(path: Union[str, Path]) -> Iterator[BinaryRecord]:
+    """依次读取二进制日志分段中的记录, 支持已被压缩的分段"""
+    with _open(Path(path)) as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"不是有效的二进制日志文件: {path}")
+        # 字符串以 (写入者, 编号) 区分; 单进程写入的文件中没有写入者帧
+        strings: Dict[Tuple[int, int], str] = {}
+        owner = 0
+        while len(header := file.read(FRAME.size)) == FRAME.size:
+            length, kind = FRAME.unpack(header)
+            data = file.read(length)
+            if len(data) != length:
+                # 写入到一半的记录
+                break
+            if kind == KIND_STRING:
+                (index,) = STRING.unpack_from(data)
+                strings[owner, index] = data[STRING.size :].decode("utf-8")
+            elif kind == KIND_OWNER:
+                (owner,) = OWNER.unpack_from(data)
+            elif kind == KIND_RECORD:
+                created, level, name, path_, lineno, size = RECORD.unpack_from(data)
+                message = data[RECORD.size : RECORD.size + size]
+                exception = data[RECORD.size + size :]
+                yield BinaryRecord(
+                    created=created / 1000000,
+                    level=strings[owner, level],
+                    name=strings[owner, name],
+                    path=strings[owner, path_],
+                    lineno=lineno,
+                    message=message.decode("utf-8", errors="replace"),
+                    exception=exception.decode("utf-8", errors="replace") or None,
+                )
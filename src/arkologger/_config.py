@@ -1,6 +1,7 @@
 from multiprocessing import RLock as Lock
 from pathlib import Path
 from typing import (
+    Dict,
     List,
     Literal,
     Optional,
@@ -32,17 +33,48 @@ class LoggerConfig(BaseSettings):
     debug: bool = False
     width: int = 180
     keywords: List[str] = []
+    message_json: Literal["off", "sniff", "auto"] = "sniff"
     time_format: str = "[%Y-%m-%d %X]"
     capture_warnings: bool = True
+    capture_caller: bool = True
+    exception_dedup_window: Optional[float] = None
+    rate_limit: Dict[Union[int, str], float] = {}
+    rate_limit_sampling: Dict[Union[int, str], float] = {}
+    rate_limit_burst: Optional[float] = None
+    rate_limit_summary_interval: float = 60
 
     log_path: Union[str, Path] = "./logs"
     project_root: Union[str, Path] = Path(".")
     max_log_file_size: Optional[int] = 1000000
+    log_compression: Optional[Literal["gzip", "lzma"]] = None
+    log_retention_count: Optional[int] = None
+    log_retention_days: Optional[int] = None
+    log_retention_size: Optional[int] = None
+    log_buffer_size: int = 0
+    log_buffer_flush_interval: Optional[int] = 1000
+    log_buffer_flush_level: int = 40
+    log_multiprocess: bool = False
+    ring_buffer_size: Optional[int] = None
+    json_log: bool = False
+    json_log_locals: bool = False
+    binary_log: bool = False
+
+    async_mode: bool = False
+    async_queue_size: int = 10000
+    async_overflow: Literal["block", "drop_oldest", "drop_newest"] = "block"
+    async_workers: int = 1
 
     traceback_max_frames: int = 20
     traceback_locals_max_depth: Optional[int] = None
     traceback_locals_max_length: int = 10
     traceback_locals_max_string: int = 80
+    traceback_locals_budget_nodes: Optional[int] = None
+    traceback_locals_budget_size: Optional[int] = None
+    traceback_locals_budget_time: Optional[float] = None
+    traceback_locals_allow_types: List[str] = []
+    traceback_locals_deny_types: List[str] = []
+    traceback_source_cache_size: int = 16 * 1024 * 1024
+    traceback_source_revalidate_interval: Optional[float] = 1
 
     class Config(BaseSettings.Config):
         env_prefix = "logger_"
@@ -0,0 +1,136 @@
+import logging
+from threading import Lock
+from time import monotonic
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    TYPE_CHECKING,
+)
+
+if TYPE_CHECKING:
+    from logging import LogRecord  # pylint: disable=unused-import
+
+__all__ = ["ExceptionDeduplicator", "exception_fingerprint"]
+
+# 汇总记录沿用首条记录的这些属性
+SUMMARY_ATTRIBUTES = (
+    "name",
+    "levelno",
+    "levelname",
+    "pathname",
+    "filename",
+    "module",
+    "lineno",
+    "funcName",
+)
+
+
+def exception_fingerprint(record: "LogRecord") -> Optional[Hashable]:
+    """由记录的调用位置、异常类型与异常经过的代码位置组成的指纹; 记录不包含异常时返回 None"""
+    if not record.exc_info or record.exc_info[0] is None:
+        return None
+    exc_type, _, traceback = record.exc_info
+    frames = []
+    while traceback is not None:
+        code = traceback.tb_frame.f_code
+        frames.append((code.co_filename, code.co_name, traceback.tb_lineno))
+        traceback = traceback.tb_next
+    return record.pathname, record.lineno, exc_type, tuple(frames)
+
+
+class _Entry:
+    __slots__ = ("first", "last", "count", "attributes", "label")
+
+    def __init__(self, now: float, attributes: Dict[str, Any], label: str) -> None:
+        self.first = now
+        self.last = now
+        self.count = 0
+        self.attributes = attributes
+        self.label = label
+
+
+class ExceptionDeduplicator:
+    """在时间窗口内合并重复的异常记录
+
+    同一指纹的异常在窗口内只有第一条会被完整处理, 其余的只会被计数; 窗口结束后,
+    若有被合并的记录, 则生成一条 ``repeated N times in Ts`` 的汇总记录.
+    过期的窗口在之后的记录到来时被检查, 也可以通过 ``collect(force=True)`` 立即结束所有窗口.
+
+    Args:
+        window (float): 窗口的长度(秒).
+        max_size (int): 同时记录的指纹的最大数量; 超出时最早的窗口会被提前结束.
+    """
+
+    def __init__(self, window: float, max_size: int = 1024) -> None:
+        self.window = window
+        self.max_size = max_size
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._pending: List["LogRecord"] = []
+        self._next_sweep = monotonic() + window
+        self._lock = Lock()
+
+    def _summarize(self, entry: _Entry) -> None:
+        if entry.count:
+            self._pending.append(
+                logging.makeLogRecord(
+                    {
+                        **entry.attributes,
+                        "msg": "%s repeated %d times in %.1fs",
+                        "args": (entry.label, entry.count, entry.last - entry.first),
+                        "repeated": entry.count,
+                    }
+                )
+            )
+
+    def check(self, record: "LogRecord") -> bool:
+        """返回记录是否需要被处理; 重复的记录只会被计数"""
+        if (fingerprint := exception_fingerprint(record)) is None:
+            return True
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None:
+                if now - entry.first < self.window:
+                    entry.count += 1
+                    entry.last = now
+                    return False
+                # 窗口已经结束, 该记录作为新窗口的第一条被完整处理
+                del self._entries[fingerprint]
+                self._summarize(entry)
+            elif len(self._entries) >= self.max_size:
+                key = next(iter(self._entries))
+                self._summarize(self._entries.pop(key))
+            exc_type, exc_value, _ = record.exc_info
+            # noinspection PyBroadException
+            try:
+                label = f"{exc_type.__name__}: {exc_value}"
+            except Exception:  # pylint: disable=W0703
+                label = f"{exc_type.__name__}: <exception str() failed>"
+            self._entries[fingerprint] = _Entry(
+                now,
+                {name: getattr(record, name) for name in SUMMARY_ATTRIBUTES},
+                label if len(label) <= 200 else f"{label[:200]}...",
+            )
+        return True
+
+    def collect(self, force: bool = False) -> List["LogRecord"]:
+        """结束已过期的窗口并返回待输出的汇总记录
+
+        Args:
+            force (bool): 为 True 时结束所有窗口, 用于退出前输出剩余的汇总.
+        """
+        now = monotonic()
+        if not force and now < self._next_sweep and not self._pending:
+            return []
+        with self._lock:
+            if force or now >= self._next_sweep:
+                self._next_sweep = now + self.window
+                for key, entry in list(self._entries.items()):
+                    if force or now - entry.first >= self.window:
+                        del self._entries[key]
+                        self._summarize(entry)
+            pending, self._pending = self._pending, []
+        return pending
@@ -1,81 +1,292 @@
 import os
-from datetime import date
+import re
+import time
+from contextlib import contextmanager
+from datetime import (
+    date,
+    datetime,
+    timedelta,
+)
 from pathlib import Path
+from threading import (
+    Event,
+    Lock,
+    Thread,
+)
 from types import TracebackType
 from typing import (
     AnyStr,
+    Callable,
+    Dict,
+    Generator,
     IO,
     Iterable,
     Iterator,
     List,
     Optional,
+    TYPE_CHECKING,
     Type,
 )
 
-__all__ = ["FileIO"]
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+if TYPE_CHECKING:
+    from arkologger._archive import Archiver  # pylint: disable=unused-import
+
+__all__ = ["FileIO", "file_lock"]
+
+SEGMENT_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:-(\d+))?(\.\w+)(?:\.gz|\.xz)?$")
+
+
+def write_all(stream: IO[bytes], data: bytes) -> None:
+    """写入全部内容; 无缓冲的流每次 write 可能只写入一部分"""
+    view = memoryview(data)
+    while view:
+        # 若不是一次写完, 其他进程的内容可能插入其中, 但不会丢失数据
+        if not (written := stream.write(view)):
+            raise OSError(f"无法写入 {getattr(stream, 'name', stream)}")
+        view = view[written:]
+
+
+@contextmanager
+def file_lock(path: Path) -> Generator[None, None, None]:
+    """跨进程的排他文件锁, 同一时刻只有一个进程能持有"""
+    with path.open("a+b") as file:
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
 
 
 # noinspection SpellCheckingInspection
 class FileIO(IO[str]):
-    def __init__(self, path: Path, max_file_size: Optional[int] = 1000000):
+    def __init__(
+        self,
+        path: Path,
+        max_file_size: Optional[int] = 1000000,
+        archiver: Optional["Archiver"] = None,
+        buffer_size: int = 0,
+        flush_interval: Optional[float] = None,
+        multiprocess: bool = False,
+        header: bytes = b"",
+    ):
         if path.suffix != "":
             path.parent.mkdir(exist_ok=True, parents=True)
         else:
             path.mkdir(exist_ok=True, parents=True)
             path = path.joinpath("log.log")
         self._path = path
-        self._stream: Optional[IO[str]] = None
+        self._stream: Optional[IO[bytes]] = None
         self._max_file_size = max_file_size
+        self._archiver = archiver
+        # 多进程模式: 以 O_APPEND 无缓冲写入, 每条记录只调用一次 write, 滚动时持有锁文件
+        self._multiprocess = multiprocess
+        # 新文件开头写入的内容; 多进程模式下文件在锁内打开, 因此只会被写入一次
+        self._header = header
+        self._lock_path = path.with_name(f".{path.name}.lock")
+        self._inode = 0
+        self._generation = 0
+        # 当前文件的大小与日期都记录在内存中, 只有越过阈值时才会检查是否需要滚动
+        self._size = 0
+        self._date: Optional[date] = None
+        self._rollover_at = 0.0
+        # 各日期已存在的最大分段编号, 启动时扫描一次目录, 之后在内存中维护
+        self._segments: Dict[str, int] = {}
+        self._dir_mtime = 0
+        self._scan_segments()
+        if self._archiver is not None:
+            self._archiver.submit(self.dir)
+        # 写入缓冲: 累积至 buffer_size 字节或 flush_interval 秒后再一次性写入
+        self._buffer_size = buffer_size
+        self._flush_interval = flush_interval
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._buffered_at = 0.0
+        self._lock = Lock()
+        self._closed = Event()
+        if buffer_size and flush_interval:
+            Thread(
+                target=self._flush_loop, name="arko-logger-flusher", daemon=True
+            ).start()
+
+    def _scan_segments(self) -> None:
+        segments: Dict[str, int] = {}
+        with os.scandir(self.dir) as entries:
+            for entry in entries:
+                match = SEGMENT_PATTERN.match(entry.name)
+                if match is None or match.group(3) != self._path.suffix:
+                    continue
+                day, num = match.group(1), int(match.group(2) or 0)
+                if num > segments.get(day, -1):
+                    segments[day] = num
+        self._segments = segments
+        self._dir_mtime = os.stat(self.dir).st_mtime_ns
 
     def _get_file_name(self, time: date) -> Path:
-        num = 0
+        day = time.strftime("%Y-%m-%d")
 
         def get_path(n) -> Path:
             return self.dir.joinpath(
-                f"{time.strftime('%Y-%m-%d')}"
-                f"{f'-{str(n).rjust(2, str(0))}' if n else ''}.log"
+                f"{day}{f'-{str(n).rjust(2, str(0))}' if n else ''}{self._path.suffix}"
             )
 
-        path = base = get_path(num)
-        while path.exists():
-            path = get_path(num := num + 1)
-        if base.exists():
-            base.rename(path)
-            return get_path(num + 1)
-        else:
-            return get_path(num)
+        if os.stat(self.dir).st_mtime_ns != self._dir_mtime:
+            # 目录被其他进程修改过
+            self._scan_segments()
+        num = self._segments.get(day, -1) + 1
+        if (path := get_path(num)).exists():
+            self._scan_segments()
+            num = self._segments.get(day, -1) + 1
+            path = get_path(num)
+        self._segments[day] = num
+        return path
+
+    def _rotate(self, time: date) -> None:
+        self._path.rename(self._get_file_name(time))
+        if self._archiver is not None:
+            self._archiver.submit(self.dir)
 
     @property
     def dir(self) -> Path:
         return self._path.parent
 
-    @property
-    def _file_stream(self) -> IO[str]:
-        if self._stream:
+    def _open(self) -> IO[bytes]:
+        if self._path.exists():
+            stat = self._path.stat()
+            modify_date = date.fromtimestamp(stat.st_mtime)
+            if modify_date != date.today() or (
+                self._max_file_size is not None and stat.st_size >= self._max_file_size
+            ):
+                self._rotate(modify_date)
+        self._stream = self._path.open(
+            mode="ab", buffering=0 if self._multiprocess else -1
+        )
+        self._dir_mtime = os.stat(self.dir).st_mtime_ns
+        stat = os.fstat(self._stream.fileno())
+        self._size, self._inode = stat.st_size, stat.st_ino
+        if self._size == 0 and self._header:
+            write_all(self._stream, self._header)
+            self._size = len(self._header)
+        self._generation += 1
+        self._date = date.today()
+        self._rollover_at = datetime.combine(
+            self._date + timedelta(days=1), datetime.min.time()
+        ).timestamp()
+        return self._stream
+
+    def _rollover(self) -> IO[bytes]:
+        if self._stream is not None:
             self._stream.close()
-        today = date.today()
-        if not self._path.exists():
-            self._stream = self._path.open(mode="a+", encoding="utf-8")
-            return self._stream
-        file_size = os.path.getsize(self._path)
-        modify_date = date.fromtimestamp(os.stat(self._path).st_mtime)
-        if modify_date != today:
-            _file = self._get_file_name(modify_date)
-            self._path.rename(_file)
-        elif self._max_file_size is not None and file_size >= self._max_file_size:
-            _file = self._get_file_name(today)
-            self._path.rename(_file)
-        self._stream = self._path.open(mode="a+", encoding="utf-8")
+            self._stream = None
+        if self._multiprocess:
+            # 由 _open 根据文件的实际状态决定是否滚动, 其他进程可能已经完成了滚动
+            with file_lock(self._lock_path):
+                return self._open()
+        if self._path.exists():
+            self._rotate(self._date)
+        return self._open()
+
+    def _rotated_elsewhere(self) -> bool:
+        try:
+            return os.stat(self._path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    @property
+    def _file_stream(self) -> IO[bytes]:
+        if self._stream is None:
+            if self._multiprocess:
+                with file_lock(self._lock_path):
+                    return self._open()
+            return self._open()
+        if time.time() >= self._rollover_at or (
+            self._max_file_size is not None and self._size >= self._max_file_size
+        ):
+            return self._rollover()
         return self._stream
 
+    def write_with(self, render: Callable[[int], bytes]) -> None:
+        """在确定要写入的文件之后才生成内容并立即写入, 使内容可以依赖于该文件之前写入的内容
+
+        Args:
+            render (Callable[[int], bytes]): 接收当前文件的序号, 返回要写入的内容;
+                每次重新打开文件时序号都会增加. 不能与写入缓冲同时使用.
+        """
+        with self._lock:
+            if (
+                self._multiprocess
+                and self._stream is not None
+                and self._rotated_elsewhere()
+            ):
+                self._rollover()
+            stream = self._file_stream
+            data = render(self._generation)
+            write_all(stream, data)
+            if self._multiprocess:
+                self._size = stream.tell()
+            else:
+                self._size += len(data)
+                stream.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self._flush_interval):
+            if self._buffer and (
+                time.monotonic() - self._buffered_at >= self._flush_interval
+            ):
+                self.drain()
+
+    def drain(self) -> None:
+        """立即将缓冲区中的全部内容写入文件"""
+        with self._lock:
+            if self._buffer:
+                data = b"".join(self._buffer)
+                self._buffer.clear()
+                self._buffered = 0
+                if self._multiprocess:
+                    if self._stream is not None and self._rotated_elsewhere():
+                        self._rollover()
+                    stream = self._file_stream
+                    write_all(stream, data)
+                    self._size = stream.tell()
+                else:
+                    self._file_stream.write(data)
+                    self._size += len(data)
+            if self._stream is not None:
+                self._stream.flush()
+
     def close(self) -> None:
-        return self._file_stream.close()
+        self._closed.set()
+        self.drain()
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
 
     def fileno(self) -> int:
         return self._file_stream.fileno()
 
     def flush(self) -> None:
-        return self._file_stream.flush()
+        if not self._buffer_size:
+            if self._multiprocess:
+                return self.drain()
+            return self._file_stream.flush()
+        if self._buffered >= self._buffer_size or (
+            self._flush_interval is not None
+            and time.monotonic() - self._buffered_at >= self._flush_interval
+        ):
+            self.drain()
 
     def isatty(self) -> bool:
         return self._file_stream.isatty()
@@ -108,10 +319,24 @@ class FileIO(IO[str]):
         return self._file_stream.writable()
 
     def write(self, __s: AnyStr) -> int:
-        return self._file_stream.write(__s)
+        data = __s.encode("utf-8") if isinstance(__s, str) else __s
+        if not self._buffer_size and not self._multiprocess:
+            self._file_stream.write(data)
+            self._size += len(data)
+            return len(__s)
+        if not isinstance(data, bytes):
+            # 调用方可能会复用缓冲区
+            data = bytes(data)
+        with self._lock:
+            if not self._buffer:
+                self._buffered_at = time.monotonic()
+            self._buffer.append(data)
+            self._buffered += len(data)
+        return len(__s)
 
     def writelines(self, __lines: Iterable[AnyStr]) -> None:
-        return self._file_stream.writelines(__lines)
+        for line in __lines:
+            self.write(line)
 
     def __next__(self) -> AnyStr:
         return self._file_stream.__next__()
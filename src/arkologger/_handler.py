@@ -1,22 +1,37 @@
 import logging
+import math
 import os
+import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from threading import Lock
 from typing import (
     Any,
     Callable,
+    ClassVar,
+    Dict,
+    Hashable,
     Iterable,
     List,
     Literal,
     Optional,
+    Pattern,
     TYPE_CHECKING,
+    Tuple,
+    Type,
     Union,
 )
 
+import msgspec
+
+# noinspection PyProtectedMember
+from rich._log_render import LogRender as DefaultLogRender
+from rich.cells import cell_len
 from rich.console import Console
-from rich.logging import (
-    LogRender as DefaultLogRender,
-    RichHandler as DefaultRichHandler,
+from rich.highlighter import (
+    Highlighter,
+    ReprHighlighter,
 )
 from rich.table import Table
 from rich.text import (
@@ -25,16 +40,9 @@ from rich.text import (
 )
 from rich.theme import Theme
 
+from arkologger._archive import Archiver
 from arkologger._file import FileIO
-from arkologger._style import DEFAULT_STYLE
-from arkologger._traceback import Traceback
-
-try:
-    import ujson as json
-    from ujson import JSONDecodeError
-except ImportError:
-    import json
-    from json import JSONDecodeError
+from arkologger._ring import RingBufferIO
 
 if TYPE_CHECKING:
     from rich.console import (  # pylint: disable=unused-import
@@ -42,15 +50,183 @@ if TYPE_CHECKING:
         RenderableType,
     )
     from logging import LogRecord  # pylint: disable=unused-import
+    from types import ModuleType  # pylint: disable=unused-import
+
+    from arkologger._locals import LocalsBudget  # pylint: disable=unused-import
 
-__all__ = ["LogRender", "Handler", "FileHandler"]
+    # rich.traceback、rich.syntax 与 pygments 只在第一次渲染异常时才被导入
+    from arkologger._traceback import Traceback  # pylint: disable=unused-import
+
+__all__ = [
+    "LogRender",
+    "Handler",
+    "PlainTextHandler",
+    "FileHandler",
+    "RingBufferHandler",
+    "get_module_path",
+]
 
 FormatTimeCallable = Callable[[datetime], Text]
+MessageJSONMode = Literal["off", "sniff", "auto"]
 
 logging.addLevelName(5, "TRACE")
 logging.addLevelName(25, "SUCCESS")
 
 
+@lru_cache(maxsize=None)
+def get_theme() -> Theme:
+    """所有 handler 共用的主题, 在第一个 handler 被创建时才构建"""
+    from arkologger._style import DEFAULT_STYLE
+
+    return Theme(DEFAULT_STYLE)
+
+
+@lru_cache(maxsize=None)
+def get_highlighter(highlighter_class: Type[Highlighter]) -> Highlighter:
+    """同一类型的默认 highlighter 由所有 handler 共用, 使高亮后的消息可以在 handler 之间共享"""
+    return highlighter_class()
+
+
+def message_key(message: Any) -> Hashable:
+    """消息在渲染缓存中的键
+
+    字典与列表等不可哈希的消息来自记录本身或记录的缓存, 在记录存在期间不会被回收, 因此以 id 区分.
+    """
+    if message is None or isinstance(message, str):
+        return message
+    return "id", id(message)
+
+
+def get_record_cache(record: "LogRecord") -> Dict[Hashable, Any]:
+    """同一条记录在多个 handler 之间共享的渲染结果"""
+    try:
+        return record._render_cache
+    except AttributeError:
+        cache = record._render_cache = {}
+        return cache
+
+
+def share_trace_limits(handlers: Iterable[logging.Handler]) -> None:
+    """让多个 handler 按最宽松的限制提取同一份 traceback
+
+    对每一项限制, 只要有一个 handler 不作限制则为 None, 否则取最大值.
+    """
+    handlers = [i for i in handlers if isinstance(i, Handler)]
+    if not handlers:
+        return
+    limits = {}
+    for name in ("locals_max_length", "locals_max_string", "locals_max_depth"):
+        values = [getattr(i, name) for i in handlers]
+        limits[name] = None if None in values else max(values)
+    for handler in handlers:
+        handler.trace_limits = limits
+
+
+class ModulePathResolver:
+    """将文件路径转换为以点分隔的模块路径, 并缓存结果
+
+    site-packages 的路径在创建时确定; 缓存的大小有上限, 超出时淘汰最早的路径.
+
+    Args:
+        project_root (Union[str, Path]): 项目的根目录.
+        max_size (int): 缓存的路径的最大数量.
+    """
+
+    def __init__(self, project_root: Union[str, Path], max_size: int = 4096) -> None:
+        import site
+
+        self.project_root = Path(project_root)
+        self.site_packages = [Path(i) for i in site.getsitepackages()]
+        self.max_size = max_size
+        self._cache: Dict[str, str] = {}
+        self._lock = Lock()
+
+    def resolve(self, pathname: str) -> str:
+        if pathname == "<input>":
+            return "<INPUT>"
+        file_path = Path(pathname)
+        try:
+            path = str(file_path.relative_to(self.project_root))
+        except ValueError:
+            path = None
+            for site_packages in self.site_packages:
+                try:
+                    path = str(file_path.relative_to(site_packages))
+                    break
+                except ValueError:
+                    continue
+            if path is None:
+                return "<SITE>"
+        path = path.split(".")[0].replace(os.sep, ".")
+        return path.replace("lib.site-packages.", "")
+
+    def __call__(self, pathname: str) -> str:
+        if (path := self._cache.get(pathname)) is None:
+            path = self.resolve(pathname)
+            with self._lock:
+                if len(self._cache) >= self.max_size:
+                    del self._cache[next(iter(self._cache))]
+                self._cache[pathname] = path
+        return path
+
+
+@lru_cache(maxsize=16)
+def get_module_path_resolver(project_root: Union[str, Path]) -> ModulePathResolver:
+    """同一项目根目录的 handler 共享同一个缓存"""
+    return ModulePathResolver(project_root)
+
+
+def get_module_path(pathname: str, project_root: Union[str, Path]) -> str:
+    """将文件路径转换为以点分隔的模块路径"""
+    return get_module_path_resolver(project_root)(pathname)
+
+
+class TimeFormatter:
+    """缓存格式化后的时间, 在所有 handler 之间共享
+
+    同一秒内的记录共用一次 ``strftime`` 的结果, 亚秒字段(``%f``)在之后直接替换.
+    """
+
+    # 占位字符, 用于在 strftime 的结果中标记 %f 的位置
+    PLACEHOLDER = "\ue000"
+    DIRECTIVE_PATTERN = re.compile(r"%.")
+
+    def __init__(self) -> None:
+        self._templates: Dict[str, str] = {}
+        self._cache: Dict[str, Tuple[int, str]] = {}
+
+    def _get_template(self, time_format: str) -> str:
+        if (template := self._templates.get(time_format)) is None:
+            template = self._templates[time_format] = self.DIRECTIVE_PATTERN.sub(
+                lambda m: self.PLACEHOLDER if m.group() == "%f" else m.group(),
+                time_format,
+            )
+        return template
+
+    def __call__(self, created: float, time_format: str) -> str:
+        # 与 datetime.fromtimestamp 的舍入方式保持一致
+        fraction, second = math.modf(created)
+        microsecond = round(fraction * 1e6)
+        if microsecond >= 1000000:
+            second, microsecond = second + 1, microsecond - 1000000
+        elif microsecond < 0:
+            second, microsecond = second - 1, microsecond + 1000000
+        second = int(second)
+        cached = self._cache.get(time_format)
+        if cached is None or cached[0] != second:
+            text = datetime.fromtimestamp(second).strftime(
+                self._get_template(time_format)
+            )
+            cached = self._cache[time_format] = (second, text)
+        text = cached[1]
+        if self.PLACEHOLDER in text:
+            text = text.replace(self.PLACEHOLDER, f"{microsecond:06d}")
+        return text
+
+
+format_time = TimeFormatter()
+
+
 class LogRender(DefaultLogRender):
     @property
     def last_time(self):
@@ -70,6 +246,7 @@ class LogRender(DefaultLogRender):
         path: Optional[str] = None,
         line_no: Optional[int] = None,
         link_path: Optional[str] = None,
+        created: Optional[float] = None,
     ) -> Table:
         from rich.containers import Renderables
 
@@ -84,17 +261,25 @@ class LogRender(DefaultLogRender):
             output.add_column(style="log.line_no", width=4)
         row: List["RenderableType"] = []
         if self.show_time:
-            log_time = log_time or console.get_datetime()
             time_format = time_format or self.time_format
+            if log_time is None and created is None:
+                log_time = console.get_datetime()
             if callable(time_format):
-                log_time_display = time_format(log_time)
+                log_time_display = time_format(
+                    log_time or datetime.fromtimestamp(created)
+                )
+            elif log_time is None:
+                log_time_display = format_time(created, time_format)
             else:
-                log_time_display = Text(log_time.strftime(time_format))
+                log_time_display = log_time.strftime(time_format)
+            # 比较字符串即可判断时间是否重复, 无需比较 Text
             if log_time_display == self.last_time and self.omit_repeated_times:
                 row.append(Text(" " * len(log_time_display)))
             else:
-                row.append(log_time_display)
                 self.last_time = log_time_display
+                if isinstance(log_time_display, str):
+                    log_time_display = Text(log_time_display)
+                row.append(log_time_display)
         if self.show_level:
             row.append(level)
 
@@ -117,64 +302,141 @@ class LogRender(DefaultLogRender):
         return output
 
 
-class Handler(DefaultRichHandler):
+class Handler(logging.Handler):
+    """以 rich 渲染记录的 handler, 时间、等级、消息与路径分列显示
+
+    参数与 ``rich.logging.RichHandler`` 保持一致; 不继承它是为了避免在导入时加载 rich.traceback 与 pygments.
+    """
+
+    KEYWORDS: ClassVar[List[str]] = [
+        "GET",
+        "POST",
+        "HEAD",
+        "PUT",
+        "DELETE",
+        "OPTIONS",
+        "TRACE",
+        "PATCH",
+    ]
+    HIGHLIGHTER_CLASS: ClassVar[Type[Highlighter]] = ReprHighlighter
+
     def __init__(
         self,
-        *args,
+        level: Union[int, str] = logging.NOTSET,
+        console: Optional[Console] = None,
+        *,
         width: int = None,
+        show_time: bool = True,
+        omit_repeated_times: bool = True,
+        show_level: bool = True,
+        show_path: bool = True,
+        enable_link_path: bool = True,
+        highlighter: Optional[Highlighter] = None,
+        markup: bool = False,
         rich_tracebacks: bool = True,
-        locals_max_depth: Optional[int] = None,
+        tracebacks_width: Optional[int] = None,
+        tracebacks_extra_lines: int = 3,
+        tracebacks_theme: Optional[str] = None,
+        tracebacks_word_wrap: bool = True,
+        tracebacks_show_locals: bool = True,
+        tracebacks_suppress: Iterable[Union[str, "ModuleType"]] = (),
         tracebacks_max_frames: int = 100,
+        locals_max_length: int = 10,
+        locals_max_string: int = 80,
+        locals_max_depth: Optional[int] = None,
+        locals_budget: Optional["LocalsBudget"] = None,
         keywords: Optional[List[str]] = None,
         log_time_format: Union[str, FormatTimeCallable] = "[%x %X]",
         project_root: Union[str, Path] = os.getcwd(),
         color_system: Literal[
             "auto", "standard", "256", "truecolor", "windows"
         ] = "auto",
-        **kwargs,
+        message_json: MessageJSONMode = "sniff",
     ) -> None:
-        super(Handler, self).__init__(*args, rich_tracebacks=rich_tracebacks, **kwargs)
-        self._log_render = LogRender(time_format=log_time_format, show_level=True)
-        self.console = Console(
-            color_system=color_system, theme=Theme(DEFAULT_STYLE), width=width
+        super(Handler, self).__init__(level=level)
+        if message_json not in ("off", "sniff", "auto"):
+            raise ValueError(f"不支持的 JSON 消息模式: {message_json}")
+        self.message_json = message_json
+        self._log_render = LogRender(
+            show_time=show_time,
+            show_level=show_level,
+            show_path=show_path,
+            time_format=log_time_format,
+            omit_repeated_times=omit_repeated_times,
         )
-        self.tracebacks_show_locals = True
+        if console is None:
+            console = Console(color_system=color_system, theme=get_theme(), width=width)
+        else:
+            # 渲染时会用到 log.line_no 等样式, 传入的 console 不一定包含它们
+            console.push_theme(get_theme())
+        self.console = console
+        self.highlighter = highlighter or get_highlighter(self.HIGHLIGHTER_CLASS)
+        self.enable_link_path = enable_link_path
+        self.markup = markup
+        self.rich_tracebacks = rich_tracebacks
+        self.tracebacks_width = tracebacks_width
+        self.tracebacks_extra_lines = tracebacks_extra_lines
+        self.tracebacks_theme = tracebacks_theme
+        self.tracebacks_word_wrap = tracebacks_word_wrap
+        self.tracebacks_show_locals = tracebacks_show_locals
+        self.tracebacks_suppress = tracebacks_suppress
+        self.locals_max_length = locals_max_length
+        self.locals_max_string = locals_max_string
         self.tracebacks_max_frames = tracebacks_max_frames
+        self._render_keywords: Tuple[str, ...] = ()
+        self._keywords_pattern: Optional[Pattern[str]] = None
         self.render_keywords = self.KEYWORDS + (keywords or [])
         self.locals_max_depth = locals_max_depth
+        self.locals_budget = locals_budget
+        # 提取 traceback 时使用的限制; 由共享同一记录的 handler 协商得到, 渲染时再按各自的限制截断
+        self.trace_limits: Optional[Dict[str, Optional[int]]] = None
         self.project_root = project_root
 
+    @property
+    def render_keywords(self) -> Tuple[str, ...]:
+        return self._render_keywords
+
+    @render_keywords.setter
+    def render_keywords(self, keywords: Optional[Iterable[str]]) -> None:
+        # 所有关键字编译为一个正则表达式, 只需扫描一次消息; 较长的关键字优先匹配
+        self._render_keywords = tuple(self.KEYWORDS if keywords is None else keywords)
+        words = sorted(set(filter(None, self._render_keywords)), key=len, reverse=True)
+        self._keywords_pattern = (
+            re.compile("|".join(map(re.escape, words))) if words else None
+        )
+
+    @property
+    def project_root(self) -> Union[str, Path]:
+        return self._project_root
+
+    @project_root.setter
+    def project_root(self, project_root: Union[str, Path]) -> None:
+        # 在此处确定 site-packages 的路径, 之后每条记录只需查询缓存
+        self._project_root = project_root
+        self._module_path = get_module_path_resolver(project_root)
+
+    def get_path(self, record: "LogRecord") -> str:
+        return self._module_path(record.pathname)
+
+    def get_level_text(self, record: "LogRecord") -> Text:
+        cache = get_record_cache(record)
+        if (level := cache.get("level")) is None:
+            level_name = record.levelname
+            level = cache["level"] = Text.styled(
+                level_name.ljust(8), f"logging.level.{level_name.lower()}"
+            )
+        return level
+
     def render(
         self,
         *,
         record: "LogRecord",
-        traceback: Optional[Traceback],
+        traceback: Optional["Traceback"],
         message_renderable: Optional["ConsoleRenderable"],
     ) -> "ConsoleRenderable":
-        if record.pathname != "<input>":
-            try:
-                path = str(Path(record.pathname).relative_to(self.project_root))
-                path = path.split(".")[0].replace(os.sep, ".")
-            except ValueError:
-                import site
-
-                path = None
-                for s in site.getsitepackages():
-                    try:
-                        path = str(Path(record.pathname).relative_to(Path(s)))
-                        break
-                    except ValueError:
-                        continue
-                if path is None:
-                    path = "<SITE>"
-                else:
-                    path = path.split(".")[0].replace(os.sep, ".")
-        else:
-            path = "<INPUT>"
-        path = path.replace("lib.site-packages.", "")
+        path = self.get_path(record)
         _level = self.get_level_text(record)
         time_format = None if self.formatter is None else self.formatter.datefmt
-        log_time = datetime.fromtimestamp(record.created)
 
         if not traceback:
             renderables = [message_renderable]
@@ -188,7 +450,7 @@ class Handler(DefaultRichHandler):
         log_renderable = self._log_render(
             self.console,
             renderables,
-            log_time=log_time,
+            created=record.created,
             time_format=time_format,
             level=_level,
             path=path,
@@ -201,6 +463,23 @@ class Handler(DefaultRichHandler):
         self,
         record: "LogRecord",
         message: Any,
+    ) -> "ConsoleRenderable":
+        cache = get_record_cache(record)
+        key = (
+            "message_text",
+            message_key(message),
+            getattr(record, "markup", self.markup),
+            getattr(record, "highlighter", self.highlighter),
+            self._keywords_pattern,
+        )
+        if (message_text := cache.get(key)) is None:
+            message_text = cache[key] = self._render_message(record, message)
+        return message_text
+
+    def _render_message(
+        self,
+        record: "LogRecord",
+        message: Any,
     ) -> "ConsoleRenderable":
         use_markup = getattr(record, "markup", self.markup)
         if isinstance(message, str):
@@ -217,55 +496,89 @@ class Handler(DefaultRichHandler):
             # noinspection PyCallingNonCallable
             message_text = highlighter(message_text)
 
-        if self.render_keywords is None:
-            self.render_keywords = self.KEYWORDS
-
-        if self.render_keywords:
-            message_text.highlight_words(self.render_keywords, "logging.keyword")
+        if self._keywords_pattern is not None:
+            message_text.highlight_regex(self._keywords_pattern, "logging.keyword")
 
         return message_text
 
-    def emit(self, record: "LogRecord") -> None:
-        message = self.format(record)
-        _traceback = None
-        if (
+    def get_traceback_options(self, record: "LogRecord") -> Dict[str, Any]:
+        return {
+            "width": self.tracebacks_width,
+            "extra_lines": self.tracebacks_extra_lines,
+            "word_wrap": self.tracebacks_word_wrap,
+            "show_locals": (
+                getattr(record, "show_locals", None) or self.tracebacks_show_locals
+            ),
+            "locals_max_length": (
+                getattr(record, "locals_max_length", None) or self.locals_max_length
+            ),
+            "locals_max_string": (
+                getattr(record, "locals_max_string", None) or self.locals_max_string
+            ),
+            "locals_max_depth": (
+                getattr(record, "locals_max_depth")
+                if hasattr(record, "locals_max_depth")
+                else self.locals_max_depth
+            ),
+            "suppress": tuple(self.tracebacks_suppress),
+            "max_frames": self.tracebacks_max_frames,
+        }
+
+    def get_traceback(self, record: "LogRecord") -> Optional["Traceback"]:
+        if not (
             self.rich_tracebacks
             and record.exc_info
             and record.exc_info != (None, None, None)
         ):
-            exc_type, exc_value, exc_traceback = record.exc_info
-            if exc_type is None or exc_value is None:
-                raise ValueError(record)
-            try:
-                _traceback = Traceback.from_exception(
-                    exc_type,
-                    exc_value,
-                    exc_traceback,
-                    width=self.tracebacks_width,
-                    extra_lines=self.tracebacks_extra_lines,
-                    word_wrap=self.tracebacks_word_wrap,
-                    show_locals=(
-                        getattr(record, "show_locals", None)
-                        or self.tracebacks_show_locals
-                    ),
-                    locals_max_length=(
-                        getattr(record, "locals_max_length", None)
-                        or self.locals_max_length
-                    ),
-                    locals_max_string=(
-                        getattr(record, "locals_max_string", None)
-                        or self.locals_max_string
-                    ),
-                    locals_max_depth=(
-                        getattr(record, "locals_max_depth")
-                        if hasattr(record, "locals_max_depth")
-                        else self.locals_max_depth
-                    ),
-                    suppress=self.tracebacks_suppress,
-                    max_frames=self.tracebacks_max_frames,
+            return None
+        exc_type, exc_value, exc_traceback = record.exc_info
+        if exc_type is None or exc_value is None:
+            raise ValueError(record)
+        from arkologger._traceback import Traceback
+
+        options = self.get_traceback_options(record)
+        cache = get_record_cache(record)
+        key = ("traceback", *options.values())
+        if (traceback := cache.get(key)) is None:
+            # 遍历栈帧与局部变量的开销最大, 同一记录只提取一次
+            extract_options = {
+                "show_locals": options["show_locals"],
+                "locals_budget": self.locals_budget,
+            }
+            for name in ("locals_max_length", "locals_max_string", "locals_max_depth"):
+                extract_options[name] = (
+                    self.trace_limits[name]
+                    if self.trace_limits is not None and not hasattr(record, name)
+                    else options[name]
                 )
-            except ImportError:
-                return
+            trace_key = ("trace", *extract_options.values())
+            if (trace := cache.get(trace_key)) is None:
+                trace = cache[trace_key] = Traceback.extract(
+                    exc_type, exc_value, exc_traceback, **extract_options
+                )
+            traceback = cache[key] = Traceback.from_exception(
+                exc_type, exc_value, exc_traceback, trace=trace, **options
+            )
+        return traceback
+
+    def get_message(
+        self, record: "LogRecord", traceback: Optional["Traceback"] = None
+    ) -> Any:
+        cache = get_record_cache(record)
+        key = ("message", self.formatter, traceback is None, self.message_json)
+        if key not in cache:
+            cache[key] = self._get_message(record, traceback)
+        return cache[key]
+
+    def _get_message(
+        self, record: "LogRecord", traceback: Optional["Traceback"] = None
+    ) -> Any:
+        if isinstance(record.msg, (dict, list)) and not record.args:
+            # 结构化的消息直接以 JSON 的形式渲染
+            return record.msg
+        if traceback is None:
+            message = self.format(record)
+        else:
             message = record.getMessage()
             if self.formatter:
                 record.message = record.getMessage()
@@ -273,14 +586,35 @@ class Handler(DefaultRichHandler):
                 if hasattr(formatter, "usesTime") and formatter.usesTime():
                     record.asctime = formatter.formatTime(record, formatter.datefmt)
                 message = formatter.formatMessage(record)
-            if message == str(exc_value):
-                message = None
+            if message == str(record.exc_info[1]):
+                return None
+        return self.decode_message(record, message)
 
+    def decode_message(self, record: "LogRecord", message: str) -> Any:
+        """按照 ``message_json`` 的设置, 将 JSON 格式的消息解码
+
+        记录的 ``message_json`` 属性(可通过 ``extra`` 传入)优先于 handler 的设置;
+        为 True 时总是尝试解码, 为 False 时不解码.
+        """
+        mode = getattr(record, "message_json", self.message_json)
+        if mode is False or mode == "off":
+            return message
+        if mode == "sniff" and message.lstrip()[:1] not in ("{", "["):
+            # 只有看起来像对象或数组的消息才需要解码
+            return message
+        try:
+            return msgspec.json.decode(message)
+        except msgspec.DecodeError:
+            return message
+
+    def emit(self, record: "LogRecord") -> None:
+        try:
+            _traceback = self.get_traceback(record)
+        except ImportError:
+            return
+        message = self.get_message(record, _traceback)
         if message is not None:
-            try:
-                message_renderable = self.render_message(record, json.loads(message))
-            except JSONDecodeError:
-                message_renderable = self.render_message(record, message)
+            message_renderable = self.render_message(record, message)
         else:
             message_renderable = None
         log_renderable = self.render(
@@ -293,16 +627,139 @@ class Handler(DefaultRichHandler):
             self.handleError(record)
 
 
-class FileHandler(Handler):
+class PlainTextHandler(Handler):
+    """不经过 rich 的表格布局, 直接以纯文本渲染记录的 handler, 用于不需要颜色的文件输出"""
+
+    _last_time: Optional[str] = None
+
+    def _wrap(self, line: str, width: int) -> List[str]:
+        if "\t" in line:
+            line = line.expandtabs(8)
+        if cell_len(line) <= width:
+            return [line]
+        return [i.plain for i in Text(line).wrap(self.console, width, overflow="fold")]
+
+    def render_plain(
+        self,
+        record: "LogRecord",
+        message: Any,
+        traceback: Optional["Traceback"] = None,
+    ) -> str:
+        log_render = self._log_render
+        time_text = None
+        if log_render.show_time:
+            time_format = (
+                None if self.formatter is None else self.formatter.datefmt
+            ) or log_render.time_format
+            if callable(time_format):
+                time_text = time_format(datetime.fromtimestamp(record.created)).plain
+            else:
+                time_text = format_time(record.created, time_format)
+            if time_text == self._last_time and log_render.omit_repeated_times:
+                time_text = " " * cell_len(time_text)
+            else:
+                self._last_time = time_text
+
+        # 除时间外的部分只与宽度和渲染选项有关, 相同配置的 handler 共享同一份结果
+        # 不显示时间时, 各行开头也不保留时间与其后空格的位置
+        time_width = -1 if time_text is None else cell_len(time_text)
+        cache = get_record_cache(record)
+        key = (
+            "plain",
+            self.console.width,
+            time_width,
+            log_render.show_level,
+            log_render.show_path,
+            self._module_path,
+            message_key(message),
+            getattr(record, "markup", self.markup),
+            (
+                None
+                if traceback is None
+                else tuple(self.get_traceback_options(record).values())
+            ),
+        )
+        if (body := cache.get(key)) is None:
+            body = cache[key] = self._render_plain_body(
+                record, message, traceback, time_width
+            )
+        return body if time_text is None else f"{time_text} {body}"
+
+    def _render_plain_body(
+        self,
+        record: "LogRecord",
+        message: Any,
+        traceback: Optional["Traceback"],
+        time_width: int,
+    ) -> str:
+        log_render = self._log_render
+        level = ""
+        if log_render.show_level:
+            level = f"{record.levelname.ljust(log_render.level_width or 8)} "
+        path = self.get_path(record) if log_render.show_path else None
+        suffix = f" {path} {str(record.lineno).ljust(4)} " if path else ""
+        indent = " " * (time_width + 1 + cell_len(level))
+        width = self.console.width - len(indent) - cell_len(suffix)
+
+        lines: List[str] = []
+        if message is not None:
+            if not isinstance(message, str):
+                from rich.json import JSON
+
+                message = JSON.from_data(message, indent=4).text.plain
+            elif getattr(record, "markup", self.markup):
+                message = Text.from_markup(message).plain
+            for line in message.split("\n"):
+                lines.extend(self._wrap(line, width))
+        if traceback is not None:
+            options = self.console.options.update(width=width)
+            for segments in self.console.render_lines(traceback, options):
+                lines.append("".join(segment.text for segment in segments))
+        if not lines:
+            lines.append("")
+
+        blank = " " * cell_len(suffix)
+        output = [f"{level}{lines[0]}{' ' * (width - cell_len(lines[0]))}{suffix}"]
+        for line in lines[1:]:
+            output.append(f"{indent}{line}{' ' * (width - cell_len(line))}{blank}")
+        output.append("")
+        return "\n".join(output)
+
+    def emit(self, record: "LogRecord") -> None:
+        try:
+            _traceback = self.get_traceback(record)
+        except ImportError:
+            return
+        message = self.get_message(record, _traceback)
+        # noinspection PyBroadException
+        try:
+            file = self.console.file
+            file.write(self.render_plain(record, message, _traceback))
+            file.flush()
+        except Exception:  # pylint: disable=W0703
+            self.handleError(record)
+
+
+class FileHandler(PlainTextHandler):
     def __init__(
         self,
         *args,
         width: int = None,
         path: Path,
         max_file_size: Optional[int] = None,
+        archiver: Optional[Archiver] = None,
+        buffer_size: int = 0,
+        flush_interval: Optional[float] = None,
+        flush_level: int = logging.ERROR,
+        multiprocess: bool = False,
         **kwargs,
     ) -> None:
+        if len(args) > 1 or kwargs.get("console") is not None:
+            raise TypeError(
+                f"{type(self).__name__} 写入 path 指定的文件, 不能指定 console"
+            )
         super().__init__(*args, **kwargs)
+        self.flush_level = flush_level
         while True:
             try:
                 path.parent.mkdir(exist_ok=True)
@@ -317,5 +774,61 @@ class FileHandler(Handler):
                         parent = parent.parent
         path.parent.mkdir(exist_ok=True)
         self.console = Console(
-            width=width, file=FileIO(path, max_file_size), theme=Theme(DEFAULT_STYLE)
+            width=width,
+            file=FileIO(
+                path,
+                max_file_size,
+                archiver,
+                buffer_size,
+                flush_interval,
+                multiprocess,
+            ),
+            theme=get_theme(),
         )
+
+    def emit(self, record: "LogRecord") -> None:
+        super().emit(record)
+        if record.levelno >= self.flush_level:
+            self.console.file.drain()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self.console.file.drain()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.console.file.close()
+        finally:
+            self.release()
+        super().close()
+
+
+class RingBufferHandler(PlainTextHandler):
+    def __init__(
+        self,
+        *args,
+        width: int = None,
+        path: Path,
+        size: int = 16 * 1024 * 1024,
+        **kwargs,
+    ) -> None:
+        if len(args) > 1 or kwargs.get("console") is not None:
+            raise TypeError(
+                f"{type(self).__name__} 写入 path 指定的文件, 不能指定 console"
+            )
+        super().__init__(*args, **kwargs)
+        self.console = Console(
+            width=width, file=RingBufferIO(path, size), theme=get_theme()
+        )
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.console.file.close()
+        finally:
+            self.release()
+        super().close()
@@ -0,0 +1,211 @@
+import logging
+import os
+import traceback as traceback_
+from datetime import datetime
+from pathlib import Path
+from types import TracebackType
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    TYPE_CHECKING,
+    Type,
+    Union,
+)
+
+import msgspec
+
+from arkologger._file import FileIO
+from arkologger._handler import get_module_path
+
+if TYPE_CHECKING:
+    from arkologger._archive import Archiver  # pylint: disable=unused-import
+    from logging import LogRecord  # pylint: disable=unused-import
+
+__all__ = ["JSONFileHandler"]
+
+# LogRecord 自带的属性, 其余属性视为 extra 字段
+RECORD_ATTRIBUTES = frozenset(
+    logging.makeLogRecord({}).__dict__.keys() | {"message", "asctime", "taskName"}
+)
+
+
+class FrameInfo(msgspec.Struct, omit_defaults=True):
+    filename: str
+    lineno: int
+    name: str
+    locals: Optional[Dict[str, str]] = None
+
+
+class ExceptionInfo(msgspec.Struct, omit_defaults=True):
+    type: str
+    value: str
+    frames: List[FrameInfo]
+    is_cause: bool = False
+
+
+class RecordInfo(msgspec.Struct, omit_defaults=True):
+    timestamp: datetime
+    level: str
+    name: str
+    path: str
+    lineno: int
+    message: Any
+    extra: Dict[str, Any] = {}
+    exception: Optional[List[ExceptionInfo]] = None
+
+
+def _encode_default(obj: Any) -> Any:
+    # noinspection PyBroadException
+    try:
+        return repr(obj)
+    except Exception:  # pylint: disable=W0703
+        return f"<{type(obj).__name__} object>"
+
+
+def _safe_str(obj: Any) -> str:
+    # noinspection PyBroadException
+    try:
+        return str(obj)
+    except Exception:  # pylint: disable=W0703
+        return "<exception str() failed>"
+
+
+def _safe_repr(obj: Any, max_string: Optional[int]) -> str:
+    result = _encode_default(obj)
+    if max_string is not None and len(result) > max_string:
+        result = f"{result[:max_string]}+{len(result) - max_string}"
+    return result
+
+
+def extract_exception(
+    exc_type: Type[BaseException],
+    exc_value: BaseException,
+    traceback: Optional[TracebackType],
+    show_locals: bool = False,
+    locals_max_string: Optional[int] = 80,
+) -> List[ExceptionInfo]:
+    """将异常及其 ``__cause__`` / ``__context__`` 链转换为可序列化的结构"""
+    stacks: List[ExceptionInfo] = []
+    is_cause = False
+    while True:
+        frames = [
+            FrameInfo(
+                filename=frame.f_code.co_filename,
+                lineno=line_no,
+                name=frame.f_code.co_name,
+                locals=(
+                    {
+                        key: _safe_repr(value, locals_max_string)
+                        for key, value in frame.f_locals.items()
+                    }
+                    if show_locals
+                    else None
+                ),
+            )
+            for frame, line_no in traceback_.walk_tb(traceback)
+        ]
+        stacks.append(
+            ExceptionInfo(
+                type=exc_type.__name__,
+                value=_safe_str(exc_value),
+                frames=frames,
+                is_cause=is_cause,
+            )
+        )
+        if (cause := exc_value.__cause__) is not None:
+            is_cause = True
+        elif (
+            cause := exc_value.__context__
+        ) is not None and not exc_value.__suppress_context__:
+            is_cause = False
+        else:
+            break
+        exc_type, exc_value, traceback = type(cause), cause, cause.__traceback__
+    return stacks
+
+
+class JSONFileHandler(logging.Handler):
+    """以 JSON Lines 格式写入结构化记录的 handler, 每条记录占一行"""
+
+    def __init__(
+        self,
+        *args,
+        path: Path,
+        max_file_size: Optional[int] = None,
+        archiver: Optional["Archiver"] = None,
+        buffer_size: int = 0,
+        flush_interval: Optional[float] = None,
+        flush_level: int = logging.ERROR,
+        multiprocess: bool = False,
+        project_root: Union[str, Path] = os.getcwd(),
+        show_locals: bool = False,
+        locals_max_string: Optional[int] = 80,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.project_root = project_root
+        self.show_locals = show_locals
+        self.locals_max_string = locals_max_string
+        self.flush_level = flush_level
+        self.file = FileIO(
+            path, max_file_size, archiver, buffer_size, flush_interval, multiprocess
+        )
+        self._encoder = msgspec.json.Encoder(enc_hook=_encode_default)
+        self._buffer = bytearray(512)
+
+    def to_struct(self, record: "LogRecord") -> RecordInfo:
+        if isinstance(record.msg, (dict, list)) and not record.args:
+            message = record.msg
+        else:
+            message = record.getMessage()
+        exception = None
+        if record.exc_info and record.exc_info[0] is not None:
+            exception = extract_exception(
+                *record.exc_info,
+                show_locals=self.show_locals,
+                locals_max_string=self.locals_max_string,
+            )
+        return RecordInfo(
+            timestamp=datetime.fromtimestamp(record.created).astimezone(),
+            level=record.levelname,
+            name=record.name,
+            path=get_module_path(record.pathname, self.project_root),
+            lineno=record.lineno,
+            message=message,
+            extra={
+                key: value
+                for key, value in record.__dict__.items()
+                if key not in RECORD_ATTRIBUTES and not key.startswith("_")
+            },
+            exception=exception,
+        )
+
+    def emit(self, record: "LogRecord") -> None:
+        # noinspection PyBroadException
+        try:
+            buffer = self._buffer
+            self._encoder.encode_into(self.to_struct(record), buffer)
+            buffer.extend(b"\n")
+            self.file.write(buffer)
+            self.file.flush()
+            if record.levelno >= self.flush_level:
+                self.file.drain()
+        except Exception:  # pylint: disable=W0703
+            self.handleError(record)
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self.file.drain()
+        finally:
+            self.release()
+
+    def close(self) -> None:
+        self.acquire()
+        try:
+            self.file.close()
+        finally:
+            self.release()
+        super().close()
@@ -0,0 +1,414 @@
+from dataclasses import (
+    fields,
+    is_dataclass,
+)
+from inspect import isclass
+from itertools import islice
+from time import monotonic
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TYPE_CHECKING,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from rich.pretty import Node  # pylint: disable=unused-import
+
+__all__ = ["LocalsBudget", "LocalsMeter"]
+
+
+def iter_rich_args(rich_args: Iterable[Any]) -> Iterable[Union[Any, Tuple[str, Any]]]:
+    for arg in rich_args:
+        if isinstance(arg, tuple):
+            if len(arg) == 3:
+                key, child, default = arg
+                if default == child:
+                    continue
+                yield key, child
+            elif len(arg) == 2:
+                key, child = arg
+                yield key, child
+            elif len(arg) == 1:
+                yield arg[0]
+        else:
+            yield arg
+
+
+class LocalsBudget:
+    """一次 traceback 提取局部变量时的总预算, 由所有栈帧共享
+
+    预算在遍历每个节点时检查; 用尽后尚未遍历的值以 ``...`` 代替, 其余的变量也不再提取,
+    并以 ``locals truncated`` 标记.
+    类型名为 ``模块.类名`` , 规则可以是完整的类型名或模块前缀, 并对子类同样生效.
+
+    Args:
+        max_nodes (int, optional): repr 树的最大节点总数; 若为 None , 则表示不作限制. 默认为 None.
+        max_size (int, optional): repr 的最大总字符数; 若为 None , 则表示不作限制. 默认为 None.
+        max_time (float, optional): 提取局部变量的最长时间(秒); 若为 None , 则表示不作限制. 默认为 None.
+        deny_types (Iterable[str]): 只显示类型名、不遍历其内容的类型.
+        allow_types (Iterable[str]): 总是完整遍历的类型, 优先于 ``deny_types``.
+    """
+
+    def __init__(
+        self,
+        max_nodes: Optional[int] = None,
+        max_size: Optional[int] = None,
+        max_time: Optional[float] = None,
+        deny_types: Iterable[str] = (),
+        allow_types: Iterable[str] = (),
+    ) -> None:
+        self.max_nodes = max_nodes
+        self.max_size = max_size
+        self.max_time = max_time
+        self.deny_types = tuple(deny_types)
+        self.allow_types = tuple(allow_types)
+        self._summarized: Dict[type, bool] = {}
+
+    @staticmethod
+    def _match(name: str, rules: Tuple[str, ...]) -> bool:
+        return any(name == rule or name.startswith(f"{rule}.") for rule in rules)
+
+    def is_summarized(self, cls: type) -> bool:
+        """该类型是否只显示类型名"""
+        if (result := self._summarized.get(cls)) is None:
+            result = False
+            for base in cls.__mro__:
+                name = f"{base.__module__}.{base.__qualname__}"
+                if self._match(name, self.allow_types):
+                    break
+                if self._match(name, self.deny_types):
+                    result = True
+                    break
+            if len(self._summarized) >= 1024:
+                self._summarized.clear()
+            self._summarized[cls] = result
+        return result
+
+    def start(self) -> "LocalsMeter":
+        return LocalsMeter(self)
+
+
+class LocalsMeter:
+    """记录一次提取已经消耗的预算"""
+
+    __slots__ = ("budget", "nodes", "size", "deadline", "exhausted")
+
+    def __init__(self, budget: LocalsBudget) -> None:
+        self.budget = budget
+        self.nodes = 0
+        self.size = 0
+        self.deadline = (
+            None if budget.max_time is None else monotonic() + budget.max_time
+        )
+        self.exhausted: Optional[str] = None
+
+    def _spend(self, size: int = 0) -> None:
+        budget = self.budget
+        self.nodes += 1
+        self.size += size
+        if budget.max_nodes is not None and self.nodes >= budget.max_nodes:
+            self.exhausted = "node"
+        elif budget.max_size is not None and self.size >= budget.max_size:
+            self.exhausted = "size"
+        elif self.deadline is not None and monotonic() >= self.deadline:
+            self.exhausted = "time"
+
+    def traverse(
+        self,
+        value: Any,
+        max_length: Optional[int] = None,
+        max_string: Optional[int] = None,
+        max_depth: Optional[int] = None,
+    ) -> "Node":
+        """与 ``rich.pretty.traverse`` 相同, 但每生成一个节点便检查预算
+
+        预算用尽后, 尚未遍历的值以 ``...`` 代替, 已经生成的部分保持不变.
+        """
+        from rich.pretty import Node
+
+        try:
+            # noinspection PyProtectedMember
+            from rich._loop import loop_last
+
+            # noinspection PyProtectedMember
+            from rich.pretty import (
+                _BRACES,
+                _CONTAINERS,
+                _MAPPING_CONTAINERS,
+                _get_attr_fields,
+                _has_default_namedtuple_repr,
+                _is_attr_object,
+                _is_dataclass_repr,
+                _is_namedtuple,
+                _safe_isinstance,
+            )
+        except ImportError:
+            # rich 的私有接口发生了变化
+            return self._traverse_rich(value, max_length, max_string, max_depth)
+
+        budget = self.budget
+        spend = self._spend
+
+        def to_repr(obj: Any) -> str:
+            if (
+                max_string is not None
+                and _safe_isinstance(obj, (bytes, str))
+                and len(obj) > max_string
+            ):
+                return f"{obj[:max_string]!r}+{len(obj) - max_string}"
+            # noinspection PyBroadException
+            try:
+                return repr(obj)
+            except Exception as error:  # pylint: disable=W0703
+                return f"<repr-error {str(error)!r}>"
+
+        def leaf(obj_repr: str, root: bool = False) -> Node:
+            spend(len(obj_repr))
+            return Node(value_repr=obj_repr, last=root)
+
+        def add_children(
+            children: List[Node],
+            items: Iterable[Tuple[Optional[str], Any, str]],
+            depth: int,
+        ) -> None:
+            # items 为 (键的 repr, 值, 键与值之间的分隔符)
+            for last, (key, child, separator) in loop_last(items):
+                child_node = _traverse(child, depth=depth + 1)
+                if key is not None:
+                    child_node.key_repr = key
+                    child_node.key_separator = separator
+                    self.size += len(key)
+                child_node.last = last
+                children.append(child_node)
+
+        visited_ids: Set[int] = set()
+
+        def _traverse(obj: Any, root: bool = False, depth: int = 0) -> Node:
+            if self.exhausted or id(obj) in visited_ids:
+                return Node(value_repr="...")
+            obj_type = type(obj)
+            if budget.deny_types and budget.is_summarized(obj_type):
+                return leaf(f"<{obj_type.__module__}.{obj_type.__qualname__} object>")
+            reached_max_depth = max_depth is not None and depth >= max_depth
+            children: List[Node] = []
+            try:
+                fake_attributes = hasattr(
+                    obj, "awehoi234_wdfjwljet234_234wdfoijsdfmmnxpi492"
+                )
+            except Exception:  # pylint: disable=W0703
+                fake_attributes = False
+            rich_repr_result = None
+            if not fake_attributes:
+                # noinspection PyBroadException
+                try:
+                    if hasattr(obj, "__rich_repr__") and not isclass(obj):
+                        rich_repr_result = obj.__rich_repr__()
+                except Exception:  # pylint: disable=W0703
+                    pass
+
+            visited_ids.add(id(obj))
+            if rich_repr_result is not None:
+                angular = getattr(obj.__rich_repr__, "angular", False)
+                args = list(iter_rich_args(rich_repr_result))
+                class_name = obj.__class__.__name__
+                if not args:
+                    node = leaf(
+                        f"<{class_name}>" if angular else f"{class_name}()", root
+                    )
+                    node.children = []
+                elif reached_max_depth:
+                    node = leaf(
+                        f"<{class_name}...>" if angular else f"{class_name}(...)"
+                    )
+                else:
+                    spend()
+                    if angular:
+                        node = Node(
+                            open_brace=f"<{class_name} ",
+                            close_brace=">",
+                            children=children,
+                            last=root,
+                            separator=" ",
+                        )
+                    else:
+                        node = Node(
+                            open_brace=f"{class_name}(",
+                            close_brace=")",
+                            children=children,
+                            last=root,
+                        )
+                    add_children(
+                        children,
+                        (
+                            (
+                                (arg[0], arg[1], "=")
+                                if _safe_isinstance(arg, tuple)
+                                else (None, arg, "")
+                            )
+                            for arg in args
+                        ),
+                        depth,
+                    )
+            elif _is_attr_object(obj) and not fake_attributes:
+                class_name = obj.__class__.__name__
+                if not (attr_fields := _get_attr_fields(obj)):
+                    node = leaf(f"{class_name}()", root)
+                    node.children = []
+                elif reached_max_depth:
+                    node = leaf(f"{class_name}(...)")
+                else:
+                    spend()
+                    node = Node(
+                        open_brace=f"{class_name}(",
+                        close_brace=")",
+                        children=children,
+                        last=root,
+                    )
+                    for last, attr in loop_last(i for i in attr_fields if i.repr):
+                        repr_callable = attr.repr if callable(attr.repr) else None
+                        try:
+                            attr_value = getattr(obj, attr.name)
+                        except Exception as error:  # pylint: disable=W0703
+                            attr_value, repr_callable = error, None
+                        if repr_callable:
+                            child_node = leaf(str(repr_callable(attr_value)))
+                        else:
+                            child_node = _traverse(attr_value, depth=depth + 1)
+                        child_node.last = last
+                        child_node.key_repr = attr.name
+                        child_node.key_separator = "="
+                        self.size += len(attr.name)
+                        children.append(child_node)
+            elif (
+                is_dataclass(obj)
+                and not _safe_isinstance(obj, type)
+                and not fake_attributes
+                and _is_dataclass_repr(obj)
+            ):
+                class_name = obj.__class__.__name__
+                if reached_max_depth:
+                    node = leaf(f"{class_name}(...)")
+                else:
+                    spend()
+                    node = Node(
+                        open_brace=f"{class_name}(",
+                        close_brace=")",
+                        children=children,
+                        last=root,
+                        empty=f"{class_name}()",
+                    )
+                    add_children(
+                        children,
+                        (
+                            (field.name, getattr(obj, field.name), "=")
+                            for field in fields(obj)
+                            if field.repr
+                        ),
+                        depth,
+                    )
+            elif _is_namedtuple(obj) and _has_default_namedtuple_repr(obj):
+                class_name = obj.__class__.__name__
+                if reached_max_depth:
+                    node = leaf(f"{class_name}(...)")
+                else:
+                    spend()
+                    node = Node(
+                        open_brace=f"{class_name}(",
+                        close_brace=")",
+                        children=children,
+                        empty=f"{class_name}()",
+                    )
+                    add_children(
+                        children,
+                        ((key, child, "=") for key, child in obj._asdict().items()),
+                        depth,
+                    )
+            elif _safe_isinstance(obj, _CONTAINERS):
+                for container_type in _CONTAINERS:
+                    if _safe_isinstance(obj, container_type):
+                        obj_type = container_type
+                        break
+                open_brace, close_brace, empty = _BRACES[obj_type](obj)
+                if reached_max_depth:
+                    node = leaf(f"{open_brace}...{close_brace}")
+                elif obj_type.__repr__ != type(obj).__repr__:
+                    node = leaf(to_repr(obj), root)
+                elif obj:
+                    spend()
+                    node = Node(
+                        open_brace=open_brace,
+                        close_brace=close_brace,
+                        children=children,
+                        last=root,
+                    )
+                    last_index = len(obj) - 1
+                    if _safe_isinstance(obj, _MAPPING_CONTAINERS):
+                        for index, (key, child) in enumerate(
+                            islice(obj.items(), max_length)
+                        ):
+                            child_node = _traverse(child, depth=depth + 1)
+                            child_node.key_repr = to_repr(key)
+                            child_node.last = index == last_index
+                            self.size += len(child_node.key_repr)
+                            children.append(child_node)
+                    else:
+                        for index, child in enumerate(islice(obj, max_length)):
+                            child_node = _traverse(child, depth=depth + 1)
+                            child_node.last = index == last_index
+                            children.append(child_node)
+                    if max_length is not None and len(obj) > max_length:
+                        children.append(
+                            leaf(f"... +{len(obj) - max_length}", root=True)
+                        )
+                else:
+                    spend(len(empty))
+                    node = Node(empty=empty, children=[], last=root)
+            else:
+                node = leaf(to_repr(obj), root)
+            visited_ids.discard(id(obj))
+            node.is_tuple = _safe_isinstance(obj, tuple)
+            node.is_namedtuple = _is_namedtuple(obj)
+            return node
+
+        return _traverse(value, root=True)
+
+    def _traverse_rich(
+        self,
+        value: Any,
+        max_length: Optional[int] = None,
+        max_string: Optional[int] = None,
+        max_depth: Optional[int] = None,
+    ) -> "Node":
+        """使用 ``rich.pretty.traverse`` 遍历, 之后再统计消耗的预算
+
+        遍历途中无法中止, 预算只对之后的变量生效, ``deny_types`` 也不再生效.
+        """
+        from rich.pretty import (
+            Node,
+            traverse,
+        )
+
+        if self.exhausted:
+            return Node(value_repr="...")
+        node = traverse(
+            value, max_length=max_length, max_string=max_string, max_depth=max_depth
+        )
+        stack = [node]
+        while stack and not self.exhausted:
+            current = stack.pop()
+            self._spend(
+                len(current.key_repr) + len(current.value_repr or current.empty)
+            )
+            stack.extend(current.children or ())
+        return node
+
+    def marker(self) -> "Node":
+        from rich.pretty import Node
+
+        return Node(value_repr=f"<locals truncated: {self.exhausted} budget exhausted>")
@@ -1,17 +1,24 @@
-import inspect
 import io
 import logging
 import os
+import re
+import sys
 import traceback as traceback_
 from multiprocessing import RLock as Lock
 from pathlib import Path
-from types import TracebackType
+from types import (
+    CodeType,
+    TracebackType,
+)
 from typing import (
     Any,
     Callable,
+    Dict,
+    Iterable,
     List,
     Mapping,
     Optional,
+    Pattern,
     TYPE_CHECKING,
     Tuple,
     Type,
@@ -20,16 +27,29 @@ from typing import (
 
 from typing_extensions import Self
 
+from arkologger._archive import Archiver
+from arkologger._async import AsyncHandler
+from arkologger._binary import BinaryFileHandler
+from arkologger._dedup import ExceptionDeduplicator
 from arkologger._handler import (
     FileHandler,
     Handler,
+    RingBufferHandler,
+    share_trace_limits,
+)
+from arkologger._json import JSONFileHandler
+from arkologger._locals import LocalsBudget
+from arkologger._ratelimit import (
+    RateLimiter,
+    to_level,
 )
+from arkologger._source import source_cache
 
 if TYPE_CHECKING:
     from arkologger import LoggerConfig
     from logging import LogRecord  # pylint: disable=unused-import
 
-__all__ = ["Logger", "LogFilter"]
+__all__ = ["Logger", "LazyLogger", "LogFilter"]
 
 SysExcInfoType = Union[
     Tuple[Type[BaseException], BaseException, Optional[TracebackType]],
@@ -40,6 +60,38 @@ ExceptionInfoType = Union[bool, SysExcInfoType, BaseException]
 _lock = Lock()
 NONE = object()
 
+# 查找调用者时需要跳过的文件
+_SKIP_FILENAMES = frozenset(
+    os.path.normcase(i)
+    for i in (
+        __file__,
+        Path(__file__).resolve(),
+        logging.addLevelName.__code__.co_filename,
+    )
+)
+# 代码对象是否位于需要跳过的文件中
+_skip_codes: Dict[CodeType, bool] = {}
+
+
+class _ShutdownHook(logging.Handler):
+    """不处理任何记录的 handler, 只在被关闭时调用 ``callback``
+
+    ``logging.shutdown`` 按创建的逆序关闭 handler, 因此它会先于在它之前创建的 handler 被关闭.
+    """
+
+    def __init__(self, callback: Callable[[], None]) -> None:
+        super().__init__()
+        self.callback = callback
+
+    def emit(self, record: "LogRecord") -> None:
+        pass
+
+    def close(self) -> None:
+        try:
+            self.callback()
+        finally:
+            super().close()
+
 
 class Logger(logging.Logger):
     _instance: Optional["Logger"] = None
@@ -55,16 +107,81 @@ class Logger(logging.Logger):
         from arkologger import LoggerConfig
 
         self.config = config or LoggerConfig()
+        if self.config.ring_buffer_size is not None and self.config.log_multiprocess:
+            # 环形缓冲的游标只保存在写入它的进程中
+            raise ValueError("环形缓冲 log 不支持多进程模式")
 
         level_ = 10 if self.config.debug else 20
         super().__init__(name=self.config.name, level=self.config.level or level_)
+        self._deduplicator: Optional[ExceptionDeduplicator] = None
+        if self.config.exception_dedup_window is not None:
+            # 同一异常在窗口内只完整渲染一次, 其余的合并为一条汇总记录
+            self._deduplicator = ExceptionDeduplicator(
+                self.config.exception_dedup_window
+            )
+        self._rate_limiter: Optional[RateLimiter] = None
+        if self.config.rate_limit or self.config.rate_limit_sampling:
+            # 按调用位置限流, 在查找调用者之后、创建记录之前检查
+            self._rate_limiter = RateLimiter(
+                rates=self.config.rate_limit,
+                sampling=self.config.rate_limit_sampling,
+                burst=self.config.rate_limit_burst,
+                summary_interval=self.config.rate_limit_summary_interval,
+            )
 
         log_path = Path(self.config.project_root).joinpath(self.config.log_path)
 
+        source_cache.max_size = self.config.traceback_source_cache_size
+        source_cache.revalidate_interval = (
+            self.config.traceback_source_revalidate_interval
+        )
+
+        archiver_config = {
+            "compression": self.config.log_compression,
+            "max_count": self.config.log_retention_count,
+            "max_days": self.config.log_retention_days,
+            "max_size": self.config.log_retention_size,
+        }
+        archiver = (
+            Archiver(**archiver_config)
+            if any(i is not None for i in archiver_config.values())
+            else None
+        )
+
+        buffer_config = {
+            "buffer_size": self.config.log_buffer_size,
+            "flush_interval": (
+                None
+                if self.config.log_buffer_flush_interval is None
+                else self.config.log_buffer_flush_interval / 1000
+            ),
+            "flush_level": self.config.log_buffer_flush_level,
+            "multiprocess": self.config.log_multiprocess,
+        }
+
+        # 同一条记录的 traceback 只提取一次, 因此所有 handler 共用同一份预算;
+        # 未设置任何限制时不创建预算, 直接使用 rich.pretty.traverse
+        locals_budget: Optional[LocalsBudget] = None
+        if (
+            self.config.traceback_locals_budget_nodes is not None
+            or self.config.traceback_locals_budget_size is not None
+            or self.config.traceback_locals_budget_time is not None
+            or self.config.traceback_locals_deny_types
+        ):
+            locals_budget = LocalsBudget(
+                max_nodes=self.config.traceback_locals_budget_nodes,
+                max_size=self.config.traceback_locals_budget_size,
+                max_time=self.config.traceback_locals_budget_time,
+                deny_types=self.config.traceback_locals_deny_types,
+                allow_types=self.config.traceback_locals_allow_types,
+            )
         handler_config = {
             "width": self.config.width,
+            "keywords": self.config.keywords,
+            "message_json": self.config.message_json,
             "locals_max_length": self.config.traceback_locals_max_length,
             "locals_max_string": self.config.traceback_locals_max_string,
+            "locals_budget": locals_budget,
             "project_root": self.config.project_root,
             "log_time_format": self.config.time_format,
             "color_system": self.config.color_system,
@@ -81,6 +198,8 @@ class Logger(logging.Logger):
                 level=10,
                 path=log_path.joinpath("debug/debug.log"),
                 max_file_size=self.config.max_log_file_size,
+                archiver=archiver,
+                **buffer_config,
                 locals_max_depth=1,
                 **handler_config,
             ),
@@ -89,15 +208,57 @@ class Logger(logging.Logger):
                 level=40,
                 path=log_path.joinpath("error/error.log"),
                 max_file_size=self.config.max_log_file_size,
+                archiver=archiver,
+                **buffer_config,
                 locals_max_depth=self.config.traceback_locals_max_depth,
                 **handler_config,
             ),
         )
+        handlers = [handler, debug_handler, error_handler]
+        if self.config.ring_buffer_size is not None:
+            # 环形缓冲 log 配置
+            handlers.append(
+                RingBufferHandler(
+                    level=10,
+                    path=log_path.joinpath("ring/debug.ring"),
+                    size=self.config.ring_buffer_size,
+                    locals_max_depth=1,
+                    **handler_config,
+                )
+            )
+        if self.config.json_log:
+            # json.log 配置
+            handlers.append(
+                JSONFileHandler(
+                    level=10,
+                    path=log_path.joinpath("json/json.log"),
+                    max_file_size=self.config.max_log_file_size,
+                    archiver=archiver,
+                    **buffer_config,
+                    project_root=self.config.project_root,
+                    show_locals=self.config.json_log_locals,
+                    locals_max_string=self.config.traceback_locals_max_string,
+                )
+            )
+        if self.config.binary_log:
+            # 二进制 log 配置
+            handlers.append(
+                BinaryFileHandler(
+                    level=10,
+                    path=log_path.joinpath("binary/debug.bin"),
+                    max_file_size=self.config.max_log_file_size,
+                    archiver=archiver,
+                    project_root=self.config.project_root,
+                    multiprocess=self.config.log_multiprocess,
+                )
+            )
+        # 同一条记录的 traceback 只提取一次, 由各个 handler 分别截断
+        share_trace_limits(handlers)
         logging.basicConfig(
             level=10 if self.config.debug else 20,
             format="%(message)s",
             datefmt=self.config.time_format,
-            handlers=[handler, debug_handler, error_handler],
+            handlers=handlers,
         )
         if config.capture_warnings:
             logging.captureWarnings(True)
@@ -105,9 +266,20 @@ class Logger(logging.Logger):
             warnings_logger.addHandler(handler)
             warnings_logger.addHandler(debug_handler)
 
-        self.addHandler(handler)
-        self.addHandler(debug_handler)
-        self.addHandler(error_handler)
+        if self.config.async_mode:
+            # 渲染与写入交由后台线程完成
+            handlers = [
+                AsyncHandler(
+                    handlers,
+                    queue_size=self.config.async_queue_size,
+                    overflow=self.config.async_overflow,
+                    workers=self.config.async_workers,
+                )
+            ]
+        for i in handlers:
+            self.addHandler(i)
+        # 在 logging.shutdown 关闭上面的 handler 之前输出尚未输出的汇总记录
+        self._shutdown_hook = _ShutdownHook(self.flush_summaries)
 
     def success(
         self,
@@ -147,26 +319,144 @@ class Logger(logging.Logger):
             extra=extra,
         )
 
+    def setLevel(self, level: Union[int, str]) -> None:
+        super().setLevel(level)
+        # 该 logger 并未注册在 logging.Logger.manager 中, 需要自行清除 isEnabledFor 的缓存
+        self._cache.clear()
+
+    def will_emit(self, level: int) -> bool:
+        """判断该等级的记录是否会被至少一个 handler 处理
+
+        每次都直接读取 handler 的等级, 因此不会受到 handler 等级或 handler 列表变化的影响.
+        """
+        if not self.isEnabledFor(level):
+            return False
+        logger, found = self, False
+        while logger:
+            for handler in logger.handlers:
+                found = True
+                if level >= handler.level:
+                    return True
+            if not logger.propagate:
+                break
+            logger = logger.parent
+        # 没有任何 handler 时, 记录会交由 logging.lastResort 处理
+        return not found
+
+    # noinspection PyProtectedMember
+    def _log(
+        self,
+        level: int,
+        msg: Any,
+        args: Any,
+        exc_info: Optional[ExceptionInfoType] = None,
+        extra: Optional[Mapping[str, Any]] = None,
+        stack_info: bool = False,
+        stacklevel: int = 1,
+    ) -> None:
+        # 没有 handler 会处理该记录时, 无需查找调用者与创建记录
+        if not self.will_emit(level):
+            return
+        if (limiter := self._rate_limiter) is None or level not in limiter.levels:
+            # findCaller 按帧数计算 stacklevel, 需要计入该方法本身所在的一帧
+            super()._log(level, msg, args, exc_info, extra, stack_info, stacklevel + 1)
+            return
+        sinfo = None
+        # noinspection PyUnresolvedReferences
+        if logging._srcfile:  # pylint: disable=W0212
+            try:
+                fn, lno, func, sinfo = self.findCaller(stack_info, stacklevel)
+            except ValueError:
+                fn, lno, func = "(unknown file)", 0, "(unknown function)"
+        else:
+            fn, lno, func = "(unknown file)", 0, "(unknown function)"
+        self._emit_summaries(limiter.collect())
+        # 被限流的记录不会被创建, 消息也不会被格式化
+        if not limiter.allow(fn, lno, level):
+            return
+        if exc_info:
+            if isinstance(exc_info, BaseException):
+                exc_info = (type(exc_info), exc_info, exc_info.__traceback__)
+            elif not isinstance(exc_info, tuple):
+                exc_info = sys.exc_info()
+        record = self.makeRecord(
+            self.name, level, fn, lno, msg, args, exc_info, func, extra, sinfo
+        )
+        self.handle(record)
+
+    def handle(self, record: "LogRecord") -> None:
+        if self._deduplicator is None:
+            return super().handle(record)
+        if self.disabled:
+            return None
+        if not (rv := self.filter(record)):
+            return None
+        if isinstance(rv, logging.LogRecord):
+            record = rv
+        self._emit_summaries(self._deduplicator.collect())
+        if self._deduplicator.check(record):
+            self.callHandlers(record)
+        return None
+
+    def _emit_summaries(self, summaries: List["LogRecord"]) -> None:
+        for summary in summaries:
+            summary.name = self.name
+            logger = self
+            while logger:
+                for handler in logger.handlers:
+                    # 已经关闭的 handler 不能再写入, 例如在 logging.shutdown 之后创建的汇总记录
+                    if summary.levelno >= handler.level and not getattr(
+                        handler, "_closed", False
+                    ):
+                        handler.handle(summary)
+                if not logger.propagate:
+                    break
+                logger = logger.parent
+
+    def flush_repeated(self) -> None:
+        """立即输出所有被合并的重复异常的汇总记录"""
+        if self._deduplicator is not None:
+            self._emit_summaries(self._deduplicator.collect(force=True))
+
+    def flush_suppressed(self) -> None:
+        """立即输出被限流丢弃的记录的汇总记录"""
+        if self._rate_limiter is not None:
+            self._emit_summaries(self._rate_limiter.collect(force=True))
+
+    def flush_summaries(self) -> None:
+        """立即输出所有尚未输出的汇总记录"""
+        self.flush_repeated()
+        self.flush_suppressed()
+
+    def opt(self, *, lazy: bool = False) -> Union["Logger", "LazyLogger"]:
+        """返回带有调用选项的 logger
+
+        Args:
+            lazy (bool): 为 True 时, 可调用的消息与参数只会在记录会被处理时才被调用并求值.
+        """
+        return LazyLogger(self) if lazy else self
+
     def findCaller(
         self, stack_info: bool = False, stacklevel: int = 1
     ) -> Tuple[str, int, str, Optional[str]]:
-        frame = inspect.currentframe()
-        if frame is not None:
-            frame = frame.f_back
-        original_frame = frame
-        while frame and stacklevel > 1:
-            frame = frame.f_back
-            stacklevel -= 1
-        if not frame:
-            frame = original_frame
         rv = "(unknown file)", 0, "(unknown function)", None
-        while hasattr(frame, "f_code"):
+        if not self.config.capture_caller and not stack_info:
+            return rv
+        # 第 1 层为调用 findCaller 的 logging 内部函数
+        try:
+            frame = sys._getframe(stacklevel)  # pylint: disable=W0212
+        except ValueError:
+            frame = sys._getframe(1)  # pylint: disable=W0212
+        skip_codes = _skip_codes
+        while frame is not None:
             code = frame.f_code
-            filename = os.path.normcase(code.co_filename)
-            if filename in [
-                os.path.normcase(Path(__file__).resolve()),
-                os.path.normcase(logging.addLevelName.__code__.co_filename),
-            ]:
+            if (skip := skip_codes.get(code)) is None:
+                if len(skip_codes) >= 4096:
+                    skip_codes.clear()
+                skip = skip_codes[code] = (
+                    os.path.normcase(code.co_filename) in _SKIP_FILENAMES
+                )
+            if skip:
                 frame = frame.f_back
                 continue
             sinfo = None
@@ -182,24 +472,134 @@ class Logger(logging.Logger):
             break
         return rv
 
-    # noinspection PyShadowingBuiltins
-    def addFilter(
-        self, filter: Union[logging.Filter, Callable[["LogRecord"], int]]
+
+class LazyLogger:
+    """延迟求值的 logger, 由 ``Logger.opt(lazy=True)`` 创建
+
+    消息与参数若为可调用对象, 则只在记录会被至少一个 handler 处理时才会被调用, 例如::
+
+        logger.opt(lazy=True).debug("state: %s", lambda: expensive_repr(state))
+    """
+
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: Logger) -> None:
+        self.logger = logger
+
+    def _log(self, level: int, msg: Any, args: Tuple[Any, ...], kwargs: Any) -> None:
+        if not self.logger.will_emit(level):
+            return
+        if callable(msg):
+            msg = msg()
+        args = tuple(i() if callable(i) else i for i in args)
+        # 与直接调用 Logger 相比多出该方法与 Logger.log 两帧
+        kwargs["stacklevel"] = kwargs.get("stacklevel", 1) + 2
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def log(self, level: int, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(level, msg, args, kwargs)
+
+    def debug(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(logging.INFO, msg, args, kwargs)
+
+    def success(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(25, msg, args, kwargs)
+
+    def warning(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(logging.ERROR, msg, args, kwargs)
+
+    def critical(self, msg: Any, *args: Any, **kwargs: Any) -> None:
+        self._log(logging.CRITICAL, msg, args, kwargs)
+
+    def exception(
+        self,
+        msg: Any = NONE,
+        *args: Any,
+        exc_info: Optional[ExceptionInfoType] = True,
+        **kwargs: Any,
     ) -> None:
-        for handler in self.handlers:
-            handler.addFilter(filter)
+        kwargs["exc_info"] = exc_info
+        self._log(logging.ERROR, "" if msg is NONE else msg, args, kwargs)
 
 
 class LogFilter(logging.Filter):
-    _filter_list: List[Callable[["LogRecord"], bool]] = []
+    """按实例保存的过滤器链
+
+    常用的条件在创建时声明, 并按开销从低到高编译为一组判断; 之后再依次调用通过 ``add_filter`` 添加的函数.
+    添加到 ``Logger`` 时, 每条记录只在 logger 处检查一次, 被拒绝的记录不会交给任何 handler.
+
+    Args:
+        name (str): 与 ``logging.Filter`` 相同, 只允许该 logger 及其子 logger 的记录.
+        min_level (int, optional): 允许的最低等级. 默认为 None.
+        max_level (int, optional): 允许的最高等级. 默认为 None.
+        name_prefixes (Iterable[str]): 允许的 logger 名称前缀; 为空时不作限制.
+        path_prefixes (Iterable[str]): 允许的文件路径前缀; 为空时不作限制.
+        message_pattern (Union[str, Pattern[str]], optional): 消息需要匹配的正则表达式. 默认为 None.
+    """
 
-    def __init__(self, name: str = ""):
+    def __init__(
+        self,
+        name: str = "",
+        *,
+        min_level: Optional[Union[int, str]] = None,
+        max_level: Optional[Union[int, str]] = None,
+        name_prefixes: Iterable[str] = (),
+        path_prefixes: Iterable[str] = (),
+        message_pattern: Optional[Union[str, Pattern[str]]] = None,
+    ):
         super().__init__(name=name)
+        self.min_level = None if min_level is None else to_level(min_level)
+        self.max_level = None if max_level is None else to_level(max_level)
+        self.name_prefixes = tuple(name_prefixes)
+        self.path_prefixes = tuple(path_prefixes)
+        self.message_pattern = (
+            None if message_pattern is None else re.compile(message_pattern)
+        )
+        # 以字典保存, 既保留添加顺序, 又能以常数时间去重
+        self._filters: Dict[Callable[["LogRecord"], bool], None] = {}
+        self._checks: Tuple[Callable[["LogRecord"], bool], ...] = ()
+        self.compile()
+
+    def compile(self) -> None:
+        """将声明的条件与添加的函数编译为依次执行的判断"""
+        checks: List[Callable[["LogRecord"], bool]] = []
+        min_level, max_level = self.min_level, self.max_level
+        if min_level is not None and max_level is not None:
+            checks.append(lambda record: min_level <= record.levelno <= max_level)
+        elif min_level is not None:
+            checks.append(lambda record: record.levelno >= min_level)
+        elif max_level is not None:
+            checks.append(lambda record: record.levelno <= max_level)
+        if self.name:
+            name, prefix = self.name, f"{self.name}."
+            checks.append(
+                lambda record: record.name == name or record.name.startswith(prefix)
+            )
+        if name_prefixes := self.name_prefixes:
+            checks.append(lambda record: record.name.startswith(name_prefixes))
+        if path_prefixes := self.path_prefixes:
+            checks.append(lambda record: record.pathname.startswith(path_prefixes))
+        if (pattern := self.message_pattern) is not None:
+            # 格式化消息的开销最大, 放在声明的条件的最后
+            search = pattern.search
+            checks.append(lambda record: search(record.getMessage()) is not None)
+        checks.extend(self._filters)
+        self._checks = tuple(checks)
 
     def add_filter(self, f: Callable[["LogRecord"], bool]) -> Self:
-        if f not in self._filter_list:
-            self._filter_list.append(f)
+        if f not in self._filters:
+            self._filters[f] = None
+            self.compile()
         return self
 
     def filter(self, record: "LogRecord") -> bool:
-        return all(map(lambda func: func(record), self._filter_list))
+        for check in self._checks:
+            if not check(record):
+                return False
+        return True
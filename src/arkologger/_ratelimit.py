@@ -0,0 +1,155 @@
+import logging
+from threading import Lock
+from time import monotonic
+from typing import (
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    TYPE_CHECKING,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from logging import LogRecord  # pylint: disable=unused-import
+
+__all__ = ["RateLimiter"]
+
+# 汇总记录中列出的调用位置的最大数量
+SUMMARY_SITES = 10
+
+
+def to_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+    if level.isdigit():
+        return int(level)
+    if not isinstance(result := logging.getLevelName(level.upper()), int):
+        raise ValueError(f"未知的日志等级: {level}")
+    return result
+
+
+class _Site:
+    __slots__ = ("tokens", "updated", "credit")
+
+    def __init__(self, tokens: float, now: float) -> None:
+        self.tokens = tokens
+        self.updated = now
+        self.credit = 1.0
+
+
+class RateLimiter:
+    """按调用位置限制记录的数量
+
+    每个调用位置(文件与行号)与等级拥有各自的令牌桶与采样计数; 被丢弃的记录只会被计数,
+    并每隔 ``summary_interval`` 秒生成一条汇总记录.
+
+    Args:
+        rates (Mapping[Union[int, str], float], optional): 各等级每个调用位置每秒允许的记录数.
+        sampling (Mapping[Union[int, str], float], optional): 各等级保留的记录的比例, 在 0 到 1 之间.
+            采样是确定性的, 例如 0.1 表示每 10 条保留第一条.
+        burst (float, optional): 令牌桶的容量; 若为 None , 则为每秒允许的记录数(至少为 1). 默认为 None.
+        summary_interval (float): 两条汇总记录之间的最小间隔(秒).
+    """
+
+    def __init__(
+        self,
+        rates: Optional[Mapping[Union[int, str], float]] = None,
+        sampling: Optional[Mapping[Union[int, str], float]] = None,
+        burst: Optional[float] = None,
+        summary_interval: float = 60,
+    ) -> None:
+        self.rates = {to_level(k): v for k, v in (rates or {}).items()}
+        self.sampling = {to_level(k): v for k, v in (sampling or {}).items()}
+        for ratio in self.sampling.values():
+            if not 0 <= ratio <= 1:
+                raise ValueError(f"采样比例必须在 0 到 1 之间: {ratio}")
+        self.levels = frozenset(self.rates) | frozenset(self.sampling)
+        self.burst = burst
+        self.summary_interval = summary_interval
+        # 各等级的 (每秒记录数, 令牌桶容量, 采样比例), 使检查只需查找一次
+        self._policies: Dict[int, Tuple[Optional[float], float, Optional[float]]] = {
+            level: (
+                self.rates.get(level),
+                burst if burst is not None else max(self.rates.get(level, 0), 1),
+                self.sampling.get(level),
+            )
+            for level in self.levels
+        }
+        self._sites: Dict[Tuple[str, int, int], _Site] = {}
+        self._suppressed: Dict[Tuple[str, int], int] = {}
+        self._suppressed_level = 0
+        self._started = self._next_summary = monotonic()
+        self._lock = Lock()
+
+    def allow(self, pathname: str, lineno: int, level: int) -> bool:
+        """返回该记录是否可以被创建; 被丢弃的记录只会被计数"""
+        if (policy := self._policies.get(level)) is None:
+            return True
+        rate, capacity, ratio = policy
+        now = monotonic()
+        key = (pathname, lineno, level)
+        with self._lock:
+            if (site := self._sites.get(key)) is None:
+                if len(self._sites) >= 4096:
+                    self._sites.clear()
+                site = self._sites[key] = _Site(capacity, now)
+            allowed = True
+            if ratio is not None:
+                allowed = site.credit >= 1 - 1e-9
+                site.credit += ratio - 1 if allowed else ratio
+            if allowed and rate is not None:
+                tokens = min(capacity, site.tokens + (now - site.updated) * rate)
+                site.updated = now
+                if allowed := tokens >= 1:
+                    tokens -= 1
+                site.tokens = tokens
+            if not allowed:
+                key = (pathname, lineno)
+                self._suppressed[key] = self._suppressed.get(key, 0) + 1
+                if level > self._suppressed_level:
+                    self._suppressed_level = level
+        return allowed
+
+    def collect(self, force: bool = False) -> List["LogRecord"]:
+        """间隔已到时返回被丢弃的记录的汇总记录
+
+        Args:
+            force (bool): 为 True 时忽略间隔, 用于退出前输出剩余的汇总.
+        """
+        now = monotonic()
+        if not force and now < self._next_summary:
+            return []
+        with self._lock:
+            if not force and now < self._next_summary:
+                return []
+            suppressed, self._suppressed = self._suppressed, {}
+            level, self._suppressed_level = self._suppressed_level, 0
+            elapsed, self._started = now - self._started, now
+            self._next_summary = now + self.summary_interval
+        if not suppressed:
+            return []
+        sites = sorted(suppressed.items(), key=lambda item: item[1], reverse=True)
+        details = ", ".join(
+            f"{pathname}:{lineno} ({count})"
+            for (pathname, lineno), count in sites[:SUMMARY_SITES]
+        )
+        if len(sites) > SUMMARY_SITES:
+            details += f", ... +{len(sites) - SUMMARY_SITES}"
+        total = sum(suppressed.values())
+        return [
+            logging.makeLogRecord(
+                {
+                    "levelno": level,
+                    "levelname": logging.getLevelName(level),
+                    "pathname": __file__,
+                    "filename": "_ratelimit.py",
+                    "module": "_ratelimit",
+                    "funcName": "collect",
+                    "msg": "rate limit suppressed %d records in %.1fs: %s",
+                    "args": (total, elapsed, details),
+                    "suppressed": total,
+                }
+            )
+        ]
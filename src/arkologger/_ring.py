@@ -0,0 +1,123 @@
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import (
+    AnyStr,
+    Iterator,
+    List,
+    Union,
+)
+
+__all__ = ["RingBufferIO", "read_ring_buffer"]
+
+MAGIC = b"ARKORING"
+# 魔数, 数据区容量, 写入游标, 最旧记录的位置; 游标均为自创建以来写入的总字节数
+HEADER = struct.Struct("<8sQQQ")
+FRAME = struct.Struct("<I")
+
+
+class RingBufferIO:
+    """预分配、内存映射的环形日志文件
+
+    文件大小固定为 ``size`` 字节, 写满后从头覆盖最旧的记录. 每次 ``flush`` 会把之前写入的内容作为一条记录提交.
+    游标只保存在当前进程中, 因此同一文件只能由一个进程写入.
+
+    Args:
+        path (Path): 文件路径.
+        size (int): 数据区的字节数.
+    """
+
+    def __init__(self, path: Path, size: int) -> None:
+        path.parent.mkdir(exist_ok=True, parents=True)
+        self._path = path
+        self._capacity = size
+        self._buffer: List[bytes] = []
+        total = HEADER.size + size
+        with path.open("a+b") as file:
+            if os.fstat(file.fileno()).st_size != total:
+                file.truncate(total)
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(file.fileno(), 0, total)
+            self._map = mmap.mmap(file.fileno(), total)
+        magic, capacity, self._head, self._tail = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or capacity != size or self._tail > self._head:
+            self._head = self._tail = 0
+            self._commit()
+
+    def _commit(self) -> None:
+        HEADER.pack_into(self._map, 0, MAGIC, self._capacity, self._head, self._tail)
+
+    def _read(self, position: int, length: int) -> bytes:
+        return _read(self._map, self._capacity, position, length)
+
+    def _copy(self, position: int, data: bytes) -> None:
+        offset = position % self._capacity
+        first = min(len(data), self._capacity - offset)
+        start = HEADER.size + offset
+        self._map[start : start + first] = data[:first]
+        if first < len(data):
+            self._map[HEADER.size : HEADER.size + len(data) - first] = data[first:]
+
+    def append(self, data: bytes) -> None:
+        """写入一条完整的记录, 必要时丢弃最旧的记录"""
+        data = data[: self._capacity - FRAME.size]
+        frame = FRAME.pack(len(data)) + data
+        tail = self._tail
+        while self._head + len(frame) - tail > self._capacity:
+            (length,) = FRAME.unpack(self._read(tail, FRAME.size))
+            tail += FRAME.size + length
+        if tail != self._tail:
+            # 先提交被丢弃的记录再覆盖它们, 使进程在任意时刻崩溃后文件中都只有完整的记录
+            self._tail = tail
+            self._commit()
+        self._copy(self._head, frame)
+        self._head += len(frame)
+        self._commit()
+
+    def write(self, __s: AnyStr) -> int:
+        self._buffer.append(__s.encode("utf-8") if isinstance(__s, str) else __s)
+        return len(__s)
+
+    def flush(self) -> None:
+        if self._buffer:
+            data = b"".join(self._buffer)
+            self._buffer.clear()
+            self.append(data)
+
+    def isatty(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        self.flush()
+        if not self._map.closed:
+            self._map.flush()
+            self._map.close()
+
+
+def _read(
+    buffer: Union[bytes, mmap.mmap], capacity: int, position: int, length: int
+) -> bytes:
+    offset = position % capacity
+    start = HEADER.size + offset
+    if offset + length <= capacity:
+        return buffer[start : start + length]
+    first = capacity - offset
+    return (
+        buffer[start : start + first]
+        + buffer[HEADER.size : HEADER.size + length - first]
+    )
+
+
+def read_ring_buffer(path: Union[str, Path]) -> Iterator[str]:
+    """从最旧的记录开始, 依次读取环形日志文件中的记录"""
+    data = Path(path).read_bytes()
+    magic, capacity, head, tail = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"不是有效的环形日志文件: {path}")
+    position = tail
+    while position < head:
+        (length,) = FRAME.unpack(_read(data, capacity, position, FRAME.size))
+        position += FRAME.size
+        yield _read(data, capacity, position, length).decode("utf-8", errors="replace")
+        position += length
@@ -0,0 +1,262 @@
+import io
+import os
+import tokenize
+from bisect import bisect_right
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    TYPE_CHECKING,
+    Tuple,
+    Union,
+)
+
+if TYPE_CHECKING:
+    from rich.text import Text  # pylint: disable=unused-import
+
+__all__ = ["SourceCache", "SourceWindow", "source_cache"]
+
+# Python 3.12 起 f-string 被拆分为多个 token
+FSTRING_START = getattr(tokenize, "FSTRING_START", None)
+FSTRING_END = getattr(tokenize, "FSTRING_END", None)
+SKIPPED_TOKENS = frozenset(
+    (tokenize.NL, tokenize.COMMENT, tokenize.INDENT, tokenize.DEDENT)
+)
+
+
+class SourceLayout(NamedTuple):
+    """由 tokenize 得到的源码结构, 行号均从 0 开始"""
+
+    starts: List[int]
+    """各逻辑行开始的行, 从这些行开始词法分析不会落在字符串中间"""
+    spans: Dict[int, int]
+    """跨越多行的字符串(不含其最后一行)所在的行到字符串结束的行"""
+
+
+def scan_python(code: str) -> Optional[SourceLayout]:
+    """以 tokenize 扫描源码; 无法解析时返回 None"""
+    starts: List[int] = []
+    spans: Dict[int, int] = {}
+    fstrings: List[int] = []
+    new_line = True
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(code).readline):
+            kind = token.type
+            if kind in SKIPPED_TOKENS:
+                continue
+            if kind in (tokenize.NEWLINE, tokenize.ENDMARKER):
+                new_line = True
+                continue
+            start_row, end_row = token.start[0] - 1, token.end[0] - 1
+            if new_line:
+                starts.append(start_row)
+                new_line = False
+            if kind == FSTRING_START:
+                fstrings.append(start_row)
+            elif kind == FSTRING_END:
+                start_row = fstrings.pop()
+            for row in range(start_row, end_row):
+                spans[row] = end_row
+    except (SyntaxError, tokenize.TokenError):
+        return None
+    return SourceLayout(starts, spans)
+
+
+class SourceEntry:
+    __slots__ = (
+        "stat",
+        "code",
+        "lexer_name",
+        "checked",
+        "windows",
+        "_lines",
+        "_layout",
+    )
+
+    def __init__(
+        self, stat: Tuple[int, int], code: str, lexer_name: str, checked: float
+    ) -> None:
+        self.stat = stat
+        self.code = code
+        self.lexer_name = lexer_name
+        self.checked = checked
+        self.windows: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        self._lines: Optional[List[str]] = None
+        self._layout: Union[SourceLayout, None, bool] = False
+
+    @property
+    def lines(self) -> List[str]:
+        if self._lines is None:
+            self._lines = self.code.splitlines(keepends=True)
+        return self._lines
+
+    @property
+    def layout(self) -> Optional[SourceLayout]:
+        """源码的结构, 第一次使用时扫描; 不是 Python 源码或无法解析时为 None"""
+        if self._layout is False:
+            self._layout = (
+                scan_python(self.code) if self.lexer_name == "python" else None
+            )
+        return self._layout
+
+
+class SourceWindow(NamedTuple):
+    code: str
+    """窗口内的源码"""
+    start_line: int
+    """窗口第一行的行号"""
+    line_count: int
+    """整个文件的行数"""
+    lexer_name: str
+    key: Hashable
+    """由文件名、修改时间、大小与窗口范围组成, 用于缓存高亮结果"""
+
+
+def find_window(
+    layout: SourceLayout, first: int, last: int, max_lookback: int
+) -> Tuple[int, int]:
+    """扩展 ``[first, last)`` 行, 使窗口从某个逻辑行开始, 且不会在多行字符串的中间结束
+
+    若在 ``max_lookback`` 行内找不到逻辑行的开始, 则从文件开头开始.
+    """
+    starts = layout.starts
+    start = 0
+    if (index := bisect_right(starts, first) - 1) >= 0:
+        if first - starts[index] <= max_lookback:
+            start = starts[index]
+    end = last
+    while end > 0 and (row := layout.spans.get(end - 1)) is not None:
+        end = row + 1
+    return start, end
+
+
+class SourceCache:
+    """渲染 traceback 时使用的源码缓存, 在整个进程内共享
+
+    以文件名为键, 并记录文件的修改时间与大小; 文件被修改后会重新读取. 缓存按最近使用的顺序淘汰.
+    高亮后的代码窗口也会被缓存, 其键包含文件的修改时间与大小.
+
+    Args:
+        max_size (int): 缓存的源码的最大字符数.
+        revalidate_interval (float, optional): 两次检查文件是否被修改的最小间隔(秒); 在间隔内直接使用缓存.
+            若为 None , 则每次都会检查. 默认为 1.
+        max_windows (int): 缓存的高亮窗口的最大数量.
+        max_lookback (int): 为保证多行字符串被正确高亮, 窗口向前扩展的最大行数.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 16 * 1024 * 1024,
+        revalidate_interval: Optional[float] = 1,
+        max_windows: int = 256,
+        max_lookback: int = 200,
+    ) -> None:
+        self.max_size = max_size
+        self.revalidate_interval = revalidate_interval
+        self.max_windows = max_windows
+        self.max_lookback = max_lookback
+        self._entries: "OrderedDict[str, SourceEntry]" = OrderedDict()
+        self._windows: "OrderedDict[Hashable, Text]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _store(self, filename: str, entry: SourceEntry) -> None:
+        if (old := self._entries.pop(filename, None)) is not None:
+            self._size -= len(old.code)
+        if len(entry.code) > self.max_size:
+            return
+        self._entries[filename] = entry
+        self._size += len(entry.code)
+        while self._size > self.max_size:
+            _, old = self._entries.popitem(last=False)
+            self._size -= len(old.code)
+
+    def _get_entry(
+        self, filename: str, guess_lexer: Callable[[str, str], str]
+    ) -> SourceEntry:
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(filename)
+            if entry is not None:
+                self._entries.move_to_end(filename)
+                if (
+                    self.revalidate_interval is not None
+                    and now - entry.checked < self.revalidate_interval
+                ):
+                    return entry
+        stat_result = os.stat(filename)
+        stat = (stat_result.st_mtime_ns, stat_result.st_size)
+        if entry is None or entry.stat != stat:
+            with open(filename, "rt", encoding="utf-8", errors="replace") as file:
+                code = file.read()
+            entry = SourceEntry(stat, code, guess_lexer(filename, code), now)
+        else:
+            entry.checked = now
+        with self._lock:
+            self._store(filename, entry)
+        return entry
+
+    def get(
+        self, filename: str, guess_lexer: Callable[[str, str], str]
+    ) -> Tuple[str, str]:
+        """返回文件的源码与 pygments lexer 的名称"""
+        entry = self._get_entry(filename, guess_lexer)
+        return entry.code, entry.lexer_name
+
+    def get_window(
+        self,
+        filename: str,
+        line_no: int,
+        extra_lines: int,
+        guess_lexer: Callable[[str, str], str],
+    ) -> SourceWindow:
+        """返回 ``line_no`` 前后 ``extra_lines`` 行的代码, 以及为正确高亮所需的前文"""
+        entry = self._get_entry(filename, guess_lexer)
+        lines = entry.lines
+        first = max(0, line_no - extra_lines - 1)
+        last = min(len(lines), line_no + extra_lines)
+        if (window := entry.windows.get((first, last))) is None:
+            if (layout := entry.layout) is not None:
+                start, end = find_window(layout, first, last, self.max_lookback)
+            else:
+                start, end = 0, len(lines)
+            window = entry.windows[(first, last)] = (start, end)
+        start, end = window
+        return SourceWindow(
+            code="".join(lines[start:end]),
+            start_line=start + 1,
+            line_count=entry.code.count("\n") + 1,
+            lexer_name=entry.lexer_name,
+            key=(filename, entry.stat, start, end),
+        )
+
+    def get_highlighted(self, key: Hashable) -> Optional["Text"]:
+        with self._lock:
+            if (text := self._windows.get(key)) is not None:
+                self._windows.move_to_end(key)
+            return text
+
+    def set_highlighted(self, key: Hashable, text: "Text") -> None:
+        with self._lock:
+            self._windows[key] = text
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._windows.clear()
+            self._size = 0
+
+
+source_cache = SourceCache()
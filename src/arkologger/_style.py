@@ -1,19 +1,8 @@
-from typing import Dict
-
-from pygments.style import Style as PyStyle
-from pygments.token import (
-    Comment,
-    Error,
-    Generic,
-    Keyword,
-    Literal,
-    Name,
-    Number,
-    Operator,
-    Punctuation,
-    String,
-    Text,
+from typing import (
+    Any,
+    Dict,
 )
+
 from rich.style import Style
 
 __all__ = [
@@ -54,42 +43,6 @@ CYAN = "#78dce8"
 WHITE = "#e5e9f0"
 
 
-class MonokaiProStyle(PyStyle):
-    background_color = DARK_GREY
-    highlight_color = "#49483e"
-
-    styles = {
-        # No corresponding class for the following:
-        Text: WHITE,  # class:  ''
-        Error: "#fc618d bg:#1e0010",  # class: 'err'
-        Comment: LIGHT_GREY,  # class: 'c'
-        Comment.Multiline: YELLOW,  # class: 'cm'
-        Keyword: RED,  # class: 'k'
-        Keyword.Namespace: GREEN,  # class: 'kn'
-        Operator: RED,  # class: 'o'
-        Punctuation: WHITE,  # class: 'p'
-        Name: WHITE,  # class: 'n'
-        Name.Attribute: GREEN,  # class: 'na' - to be revised
-        Name.Builtin: CYAN,  # class: 'nb'
-        Name.Builtin.Pseudo: ORANGE,  # class: 'bp'
-        Name.Class: GREEN,  # class: 'nc' - to be revised
-        Name.Decorator: PURPLE,  # class: 'nd' - to be revised
-        Name.Exception: GREEN,  # class: 'ne'
-        Name.Function: GREEN,  # class: 'nf'
-        Name.Property: ORANGE,  # class: 'py'
-        Number: PURPLE,  # class: 'm'
-        Literal: PURPLE,  # class: 'l'
-        Literal.Date: ORANGE,  # class: 'ld'
-        String: YELLOW,  # class: 's'
-        String.Regex: ORANGE,  # class: 'sr'
-        Generic.Deleted: YELLOW,  # class: 'gd',
-        Generic.Emph: "italic",  # class: 'ge'
-        Generic.Inserted: GREEN,  # class: 'gi'
-        Generic.Strong: "bold",  # class: 'gs'
-        Generic.Subheading: LIGHT_GREY,  # class: 'gu'
-    }
-
-
 DEFAULT_STYLE: Dict[str, Style] = {
     # base
     "none": Style.null(),
@@ -267,3 +220,12 @@ DEFAULT_STYLE: Dict[str, Style] = {
     "markdown.link": Style(color="bright_blue"),
     "markdown.link_url": Style(color=BLUE),
 }
+
+
+def __getattr__(name: str) -> Any:
+    # pygments 只在第一次渲染异常时才被导入
+    if name == "MonokaiProStyle":
+        from arkologger._syntax_style import MonokaiProStyle
+
+        return MonokaiProStyle
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
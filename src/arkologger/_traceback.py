@@ -7,6 +7,7 @@ from types import (
 from typing import (
     Any,
     Dict,
+    Hashable,
     Iterable,
     List,
     Mapping,
@@ -25,7 +26,10 @@ from rich.console import (
 )
 from rich.highlighter import ReprHighlighter
 from rich.panel import Panel
-from rich.pretty import Pretty
+from rich.pretty import (
+    Node,
+    Pretty,
+)
 from rich.syntax import (
     PygmentsSyntaxTheme,
     Syntax,
@@ -43,12 +47,17 @@ from rich.traceback import (
     Traceback as BaseTraceback,
 )
 
-from arkologger._style import MonokaiProStyle
+from arkologger._locals import LocalsBudget
+from arkologger._source import source_cache
+from arkologger._syntax_style import MonokaiProStyle
 
 if TYPE_CHECKING:
     from rich.console import ConsoleRenderable  # pylint: disable=W0611
 
-__all__ = ["render_scope", "Traceback"]
+__all__ = ["render_scope", "limit_node", "LocalsBudget", "Traceback"]
+
+# 在 traceback 之间共享, 使高亮结果的缓存可以命中
+THEME = PygmentsSyntaxTheme(MonokaiProStyle)
 
 
 def render_scope(
@@ -110,6 +119,130 @@ def render_scope(
     )
 
 
+# pretty.traverse 在达到最大深度时对空容器的表示
+EMPTY_COLLAPSED = {
+    "[]": "[...]",
+    "{}": "{...}",
+    "()": "(...)",
+    "set()": "{...}",
+    "frozenset()": "frozenset({...})",
+    "deque()": "deque([...])",
+}
+
+
+def limit_node(
+    node: Node,
+    max_length: Optional[int] = None,
+    max_depth: Optional[int] = None,
+    depth: int = 0,
+) -> Node:
+    """对已经提取的 repr 树重新应用长度与深度的限制
+
+    Args:
+        node (Node): 由 ``pretty.traverse`` 生成的节点.
+        max_length (int, optional): 缩写前容器的最大长度; 若为 None , 则表示没有缩写. 默认为 None.
+        max_depth (int, optional): 嵌套数据结构的最大深度; 若为 None , 则表示会一直递归访问至最后一层. 默认为 None.
+        depth (int, optional): 当前节点的深度. 默认为 0.
+
+    Returns:
+        Node: 满足限制的节点; 若无需修改, 则返回原节点.
+    """
+    if node.children is None or node.value_repr:
+        return node
+    if max_depth is not None and depth >= max_depth:
+        if node.open_brace:
+            value_repr = f"{node.open_brace.rstrip()}...{node.close_brace}"
+        elif node.empty in EMPTY_COLLAPSED:
+            # 空容器只保留了 empty, 例如 "[]"
+            value_repr = EMPTY_COLLAPSED[node.empty]
+        else:
+            return node
+        return Node(
+            key_repr=node.key_repr,
+            value_repr=value_repr,
+            last=node.last,
+            key_separator=node.key_separator,
+        )
+    children = node.children
+    # 与 pretty.traverse 一致, 只有内置容器会被缩写, 对象的属性不受长度限制
+    is_container = node.close_brace in ("]", "}", "])", "})") or (
+        node.open_brace == "(" and not node.is_namedtuple
+    )
+    if max_length is not None and is_container and children:
+        omitted = 0
+        if children[-1].value_repr.startswith("... +") and not children[-1].key_repr:
+            omitted = int(children[-1].value_repr[5:])
+            children = children[:-1]
+        if len(children) > max_length:
+            omitted += len(children) - max_length
+            children = children[:max_length]
+        if omitted:
+            children = [*children, Node(value_repr=f"... +{omitted}", last=True)]
+    limited = [
+        limit_node(child, max_length, max_depth, depth + 1) for child in children
+    ]
+    if len(limited) == len(node.children) and all(
+        a is b for a, b in zip(limited, node.children)
+    ):
+        return node
+    return Node(
+        key_repr=node.key_repr,
+        open_brace=node.open_brace,
+        close_brace=node.close_brace,
+        empty=node.empty,
+        last=node.last,
+        is_tuple=node.is_tuple,
+        is_namedtuple=node.is_namedtuple,
+        children=limited,
+        key_separator=node.key_separator,
+        separator=node.separator,
+    )
+
+
+class WindowSyntax(Syntax):
+    """只包含部分源码的 Syntax, 高亮结果会被缓存在 ``source_cache`` 中"""
+
+    def __init__(
+        self,
+        *args,
+        window_key: Optional[Hashable] = None,
+        line_count: Optional[int] = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.window_key = window_key
+        self.line_count = line_count
+
+    @property
+    def _numbers_column_width(self) -> int:
+        # 行号的宽度与渲染整个文件时保持一致
+        if self.line_count is None or not self.line_numbers:
+            return super()._numbers_column_width
+        return len(str(self.line_count)) + 2
+
+    def highlight(
+        self,
+        code: str,
+        line_range: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    ) -> Text:
+        if self.window_key is None or self._stylized_ranges:
+            return super().highlight(code, line_range)
+        key = (
+            self.window_key,
+            line_range,
+            self._lexer if isinstance(self._lexer, str) else id(self._lexer),
+            self._theme,
+            self.tab_size,
+            self.background_color,
+        )
+        if (text := source_cache.get_highlighted(key)) is None:
+            text = super().highlight(code, line_range)
+            source_cache.set_highlighted(key, text)
+        text = text.copy()
+        text.no_wrap = not self.word_wrap
+        return text
+
+
 class Traceback(BaseTraceback):
     locals_max_depth: Optional[int]
 
@@ -133,11 +266,13 @@ class Traceback(BaseTraceback):
         locals_max_length: int = 10,
         locals_max_string: int = 80,
         locals_max_depth: Optional[int] = None,
+        locals_budget: Optional[LocalsBudget] = None,
         suppress: Iterable[Union[str, ModuleType]] = (),
         max_frames: int = 100,
+        trace: Optional[Trace] = None,
         **kwargs,
     ) -> "Traceback":
-        rich_traceback = cls.extract(
+        rich_traceback = trace or cls.extract(
             exc_type=exc_type,
             exc_value=exc_value,
             traceback=traceback,
@@ -145,12 +280,13 @@ class Traceback(BaseTraceback):
             locals_max_depth=locals_max_depth,
             locals_max_string=locals_max_string,
             locals_max_length=locals_max_length,
+            locals_budget=locals_budget,
         )
         return cls(
             rich_traceback,
             width=width,
             extra_lines=extra_lines,
-            theme=PygmentsSyntaxTheme(MonokaiProStyle),
+            theme=THEME,
             word_wrap=word_wrap,
             show_locals=show_locals,
             indent_guides=indent_guides,
@@ -171,6 +307,7 @@ class Traceback(BaseTraceback):
         locals_max_length: int = 10,
         locals_max_string: int = 80,
         locals_max_depth: Optional[int] = None,
+        locals_budget: Optional[LocalsBudget] = None,
         **kwargs,
     ) -> Trace:
         # noinspection PyProtectedMember
@@ -178,6 +315,28 @@ class Traceback(BaseTraceback):
 
         stacks: List[Stack] = []
         is_cause = False
+        meter = None if locals_budget is None else locals_budget.start()
+
+        def get_locals(f_locals: Mapping[str, Any]) -> Dict[str, Node]:
+            options = {
+                "max_length": locals_max_length,
+                "max_string": locals_max_string,
+                "max_depth": locals_max_depth,
+            }
+            if meter is None:
+                return {
+                    key: pretty.traverse(value, **options)
+                    for key, value in f_locals.items()
+                }
+            result = {}
+            for key, value in f_locals.items():
+                if meter.exhausted:
+                    break
+                result[key] = meter.traverse(value, **options)
+            if meter.exhausted:
+                # 预算可能在最后一个变量中途用尽, 因此在循环之后添加标记
+                result["..."] = meter.marker()
+            return result
 
         def safe_str(_object: Any) -> str:
             # noinspection PyBroadException
@@ -222,17 +381,7 @@ class Traceback(BaseTraceback):
                     filename=filename or "?",
                     lineno=line_no,
                     name=frame_summary.f_code.co_name,
-                    locals={
-                        key: pretty.traverse(
-                            value,
-                            max_length=locals_max_length,
-                            max_string=locals_max_string,
-                            max_depth=locals_max_depth,
-                        )
-                        for key, value in frame_summary.f_locals.items()
-                    }
-                    if show_locals
-                    else None,
+                    locals=get_locals(frame_summary.f_locals) if show_locals else None,
                 )
                 append(frame)
                 if frame_summary.f_locals.get("_rich_traceback_guard", False):
@@ -264,24 +413,23 @@ class Traceback(BaseTraceback):
     def _render_stack(self, stack: Stack) -> RenderResult:
         path_highlighter = PathHighlighter()
         theme = self.theme
-        code_cache: Dict[str, str] = {}
-
-        # noinspection PyShadowingNames
-        def read_code(filename: str) -> str:
-            code = code_cache.get(filename)
-            if code is None:
-                with open(
-                    filename, "rt", encoding="utf-8", errors="replace"
-                ) as code_file:
-                    code = code_file.read()
-                code_cache[filename] = code
-            return code
 
         # noinspection PyShadowingNames
         def render_locals(frame: Frame) -> Iterable["ConsoleRenderable"]:
             if frame.locals:
+                # 提取时使用的限制可能比当前的更宽松
+                scope = (
+                    frame.locals
+                    if self.locals_max_length is None and self.locals_max_depth is None
+                    else {
+                        key: limit_node(
+                            value, self.locals_max_length, self.locals_max_depth
+                        )
+                        for key, value in frame.locals.items()
+                    }
+                )
                 yield render_scope(
-                    scope=frame.locals,
+                    scope=scope,
                     title="locals",
                     indent_guides=self.indent_guides,
                     max_length=self.locals_max_length,
@@ -336,16 +484,24 @@ class Traceback(BaseTraceback):
                         code_width = self.width - 5
                     else:
                         code_width = 100
-                    code = read_code(frame.filename)
-                    lexer_name = self._guess_lexer(frame.filename, code)
-                    syntax = Syntax(
-                        code,
-                        lexer_name,
+                    window = source_cache.get_window(
+                        frame.filename,
+                        frame.lineno,
+                        self.extra_lines,
+                        self._guess_lexer,
+                    )
+                    # 只对可见行及必要的前文进行词法分析
+                    syntax = WindowSyntax(
+                        window.code,
+                        window.lexer_name,
+                        window_key=window.key,
+                        line_count=window.line_count,
                         theme=theme,
                         line_numbers=True,
+                        start_line=window.start_line,
                         line_range=(
-                            frame.lineno - self.extra_lines,
-                            frame.lineno + self.extra_lines,
+                            frame.lineno - self.extra_lines - window.start_line + 1,
+                            frame.lineno + self.extra_lines - window.start_line + 1,
                         ),
                         highlight_lines={frame.lineno},
                         word_wrap=self.word_wrap,
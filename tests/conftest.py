@@ -0,0 +1,34 @@
+import logging
+from typing import List
+
+import pytest
+
+from arkologger import (
+    Logger,
+    LoggerConfig,
+)
+
+
+class CaptureHandler(logging.Handler):
+    def __init__(self, level: int = 1) -> None:
+        super().__init__(level)
+        self.records: List[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+@pytest.fixture
+def logger(tmp_path) -> Logger:
+    result = Logger(LoggerConfig(project_root=tmp_path, log_path="logs", width=120))
+    yield result
+    for handler in list(result.handlers):
+        result.removeHandler(handler)
+        handler.close()
+
+
+@pytest.fixture
+def capture(logger: Logger) -> CaptureHandler:
+    handler = CaptureHandler()
+    logger.addHandler(handler)
+    return handler
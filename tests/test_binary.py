@@ -0,0 +1,70 @@
+import logging
+import multiprocessing
+
+import pytest
+
+from arkologger._binary import (
+    BinaryFileHandler,
+    read_binary_log,
+)
+
+
+def make_record(message, name="test"):
+    return logging.LogRecord(name, logging.INFO, __file__, 1, message, (), None)
+
+
+def read_messages(path):
+    records = [
+        record
+        for segment in sorted(path.parent.glob("*.bin"))
+        for record in read_binary_log(segment)
+    ]
+    for record in records:
+        assert (record.level, record.lineno) == ("INFO", 1)
+        assert record.name == record.message.split("-")[0]
+    return [record.message for record in records]
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "binary" / "debug.bin"
+    handler = BinaryFileHandler(path=path, max_file_size=2000, project_root=tmp_path)
+    for i in range(200):
+        handler.handle(make_record(f"test-{i}"))
+    handler.close()
+    assert len(list(path.parent.glob("*.bin"))) > 1
+    assert sorted(read_messages(path)) == sorted(f"test-{i}" for i in range(200))
+
+
+def write_records(handler, worker):
+    for i in range(300):
+        handler.handle(make_record(f"worker{worker}-{i}", f"worker{worker}"))
+    handler.close()
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(), reason="需要 fork"
+)
+def test_multiprocess(tmp_path):
+    path = tmp_path / "binary" / "debug.bin"
+    handler = BinaryFileHandler(
+        path=path, max_file_size=20000, project_root=tmp_path, multiprocess=True
+    )
+    # 子进程继承了父进程的字符串表, 需要重新建立
+    handler.handle(make_record("parent-0", "parent"))
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=write_records, args=(handler, worker))
+        for worker in range(8)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    handler.close()
+    assert len(list(path.parent.glob("*.bin"))) > 1
+    messages = read_messages(path)
+    expected = ["parent-0"] + [
+        f"worker{worker}-{i}" for worker in range(8) for i in range(300)
+    ]
+    assert sorted(messages) == sorted(expected)
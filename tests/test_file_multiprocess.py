@@ -0,0 +1,86 @@
+import multiprocessing
+import re
+
+import pytest
+
+from arkologger._file import (
+    FileIO,
+    write_all,
+)
+
+PROCESSES = 16
+LINES = 500
+LINE_PATTERN = re.compile(r"^worker(\d+) line(\d+) x+$")
+
+
+def write_lines(path, worker, buffer_size):
+    file = FileIO(path, max_file_size=20000, buffer_size=buffer_size, multiprocess=True)
+    for i in range(LINES):
+        file.write(f"worker{worker} line{i} {'x' * (i % 50 + 1)}\n")
+        file.flush()
+    file.close()
+
+
+@pytest.mark.parametrize("buffer_size", [0, 4096])
+def test_multiprocess_rotation(tmp_path, buffer_size):
+    path = tmp_path / "debug" / "debug.log"
+    context = multiprocessing.get_context(
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    )
+    processes = [
+        context.Process(target=write_lines, args=(path, worker, buffer_size))
+        for worker in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+
+    segments = list(path.parent.glob("*.log"))
+    assert len(segments) > 1
+    lines = [
+        line
+        for segment in segments
+        for line in segment.read_text(encoding="utf-8").splitlines()
+    ]
+    assert len(lines) == PROCESSES * LINES
+    assert len(set(lines)) == len(lines)
+    seen = set()
+    for line in lines:
+        match = LINE_PATTERN.match(line)
+        assert match is not None, line
+        worker, i = map(int, match.groups())
+        assert line.count("x") == i % 50 + 1
+        seen.add((worker, i))
+    assert seen == {(w, i) for w in range(PROCESSES) for i in range(LINES)}
+
+
+class ShortWriter:
+    """每次最多写入 size 个字节的流"""
+
+    def __init__(self, stream, size):
+        self.stream = stream
+        self.size = size
+
+    def write(self, data):
+        return self.stream.write(bytes(data[: self.size]))
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def test_short_writes(tmp_path):
+    path = tmp_path / "debug" / "debug.log"
+    file = FileIO(path, header=b"HEADER\n", multiprocess=True)
+    file.write_with(lambda _: b"first line\n")
+    # noinspection PyProtectedMember
+    file._stream = ShortWriter(file._stream, 3)  # pylint: disable=W0212
+    file.write_with(lambda _: b"second line\n")
+    file.write("third line\n")
+    file.flush()
+    file.close()
+    assert path.read_bytes() == b"HEADER\nfirst line\nsecond line\nthird line\n"
+
+    with path.open("ab", buffering=0) as stream, pytest.raises(OSError):
+        write_all(ShortWriter(stream, 0), b"data")
@@ -0,0 +1,66 @@
+import logging
+from io import StringIO
+
+import pytest
+from rich.console import Console
+
+from arkologger import (
+    FileHandler,
+    Handler,
+    PlainTextHandler,
+)
+
+
+def render(**kwargs):
+    file = StringIO()
+    handler = PlainTextHandler(
+        console=Console(file=file, width=80), log_time_format="[%X]", **kwargs
+    )
+    record = logging.LogRecord("test", logging.INFO, __file__, 12, "hello", (), None)
+    handler.handle(record)
+    return file.getvalue().rstrip("\n")
+
+
+def test_plain_text_options():
+    line = render()
+    assert line.startswith("[") and "INFO     hello" in line
+    assert line.rstrip().endswith("test_handler 12")
+    line = render(show_time=False)
+    assert line.startswith("INFO     hello")
+    line = render(show_time=False, show_level=False, show_path=False)
+    assert line.rstrip() == "hello"
+    assert len(line) == 80
+
+
+def test_file_handler_rejects_console(tmp_path):
+    with pytest.raises(TypeError):
+        FileHandler(path=tmp_path / "debug.log", console=Console())
+
+
+def test_handler_with_custom_console():
+    file = StringIO()
+    handler = Handler(console=Console(file=file, width=80))
+    record = logging.LogRecord("test", logging.INFO, __file__, 12, "hello", (), None)
+    handler.handle(record)
+    assert "hello" in file.getvalue()
+    assert "test_handler" in file.getvalue()
+
+
+def test_message_json_not_shared():
+    files = [StringIO(), StringIO()]
+    handlers = [
+        PlainTextHandler(console=Console(file=file, width=80), message_json=mode)
+        for file, mode in zip(files, ("sniff", "off"))
+    ]
+    record = logging.LogRecord("test", logging.INFO, __file__, 12, '{"a": 1}', (), None)
+    for handler in handlers:
+        handler.handle(record)
+    assert '    "a": 1' in files[0].getvalue()
+    assert '{"a": 1}' in files[1].getvalue()
+
+
+def test_message_text_shared():
+    handlers = [Handler(console=Console(file=StringIO())) for _ in range(2)]
+    record = logging.LogRecord("test", logging.INFO, __file__, 12, "hello", (), None)
+    texts = [handler.render_message(record, "hello") for handler in handlers]
+    assert texts[0] is texts[1]
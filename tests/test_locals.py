@@ -0,0 +1,141 @@
+import sys
+from dataclasses import (
+    dataclass,
+    field,
+)
+from time import perf_counter
+from typing import NamedTuple
+
+import pytest
+from rich.pretty import traverse
+
+from arkologger._locals import LocalsBudget
+from arkologger._traceback import Traceback
+
+
+def tree(depth):
+    if not depth:
+        return {"value": 0}
+    return {"value": depth, "children": [tree(depth - 1) for _ in range(3)]}
+
+
+@dataclass
+class Point:
+    x: int = 1
+    tags: list = field(default_factory=lambda: [1, {"a": (2,)}])
+
+
+class Pair(NamedTuple):
+    left: int
+    right: tuple
+
+
+class Rich:
+    def __rich_repr__(self):
+        yield 1
+        yield "key", [2, 3]
+        yield "default", 4, 4
+
+
+class Angular(Rich):
+    pass
+
+
+Angular.__rich_repr__.angular = True
+
+
+def dump(node):
+    return (
+        node.key_repr,
+        node.value_repr,
+        node.open_brace,
+        node.close_brace,
+        node.empty,
+        node.last,
+        node.is_tuple,
+        node.is_namedtuple,
+        node.key_separator,
+        node.separator,
+        None if node.children is None else [dump(child) for child in node.children],
+    )
+
+
+def assert_matches_rich(value):
+    for max_depth in (None, 0, 1, 2):
+        options = {"max_length": 10, "max_string": 80, "max_depth": max_depth}
+        expected = dump(traverse(value, **options))
+        assert dump(LocalsBudget().start().traverse(value, **options)) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"a": [1, (2, 3), {4}], "b": "x" * 100, "c": list(range(20))},
+        Point(),
+        Pair(1, (2, 3)),
+        Rich(),
+        Angular(),
+        [Point(), Pair(1, ()), Rich()],
+    ],
+    ids=["containers", "dataclass", "namedtuple", "rich_repr", "angular", "mixed"],
+)
+def test_traverse_matches_rich(value):
+    assert_matches_rich(value)
+
+
+def test_traverse_matches_rich_attrs():
+    attr = pytest.importorskip("attr")
+
+    @attr.define
+    class Item:
+        x: int = 1
+        name: str = attr.field(default="s", repr=lambda value: value * 2)
+        children: list = attr.field(factory=lambda: [Point()])
+
+    assert_matches_rich(Item())
+
+
+def test_traverse_without_private_api(monkeypatch):
+    # rich 的私有接口不可用时退回 rich.pretty.traverse
+    monkeypatch.setitem(sys.modules, "rich._loop", None)
+    value = tree(3)
+    options = {"max_length": 10, "max_string": 80}
+    expected = dump(traverse(value, **options))
+    assert dump(LocalsBudget().start().traverse(value, **options)) == expected
+
+    meter = LocalsBudget(max_nodes=10).start()
+    meter.traverse(value, **options)
+    assert meter.exhausted == "node"
+
+
+def test_budget_enforced_during_traversal():
+    value = tree(9)
+    meter = LocalsBudget(max_nodes=1000).start()
+    meter.traverse(value, max_length=10)
+    assert meter.exhausted == "node"
+    assert meter.nodes == 1000
+
+    meter = LocalsBudget(max_time=0.05).start()
+    started = perf_counter()
+    meter.traverse(value, max_length=10)
+    assert meter.exhausted == "time"
+    assert perf_counter() - started < 0.5
+
+
+def test_marker_after_last_local():
+    def function(value):
+        raise ValueError
+
+    try:
+        function(tree(6))
+    except ValueError as error:
+        trace = Traceback.extract(
+            ValueError,
+            error,
+            error.__traceback__,
+            show_locals=True,
+            locals_budget=LocalsBudget(max_nodes=100),
+        )
+    frame_locals = trace.stacks[0].frames[-1].locals
+    assert list(frame_locals) == ["value", "..."]
+    assert "node budget exhausted" in frame_locals["..."].value_repr
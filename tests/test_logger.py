@@ -0,0 +1,78 @@
+import logging
+import weakref
+
+import pytest
+
+from arkologger import (
+    Logger,
+    LoggerConfig,
+)
+from conftest import CaptureHandler
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_stacklevel(logger, capture, lazy):
+    target = logger.opt(lazy=True) if lazy else logger
+
+    def level3(stacklevel):
+        target.info("message", stacklevel=stacklevel)
+
+    def level2(stacklevel):
+        level3(stacklevel)
+
+    def level1(stacklevel):
+        level2(stacklevel)
+
+    for stacklevel in range(1, 5):
+        level1(stacklevel)
+    # stacklevel 从 logging 内部的帧开始计数, 与 logging 原先的实现一致
+    assert [i.funcName for i in capture.records] == [
+        "level3",
+        "level3",
+        "level3",
+        "level2",
+    ]
+
+
+def test_will_emit_follows_handler_level(logger):
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.addHandler(handler := CaptureHandler(logging.WARNING))
+    logger.setLevel(5)
+    logger.log(5, "dropped")
+    handler.setLevel(5)
+    logger.log(5, "kept")
+    handler.level = logging.ERROR
+    logger.log(5, "dropped")
+    assert [i.getMessage() for i in handler.records] == ["kept"]
+
+
+def test_summaries_before_shutdown(tmp_path):
+    config = LoggerConfig(
+        project_root=tmp_path, exception_dedup_window=60, rate_limit={"INFO": 1}
+    )
+    logger = Logger(config)
+    logger.addHandler(handler := CaptureHandler())
+    for _ in range(3):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+        logger.info("spam")
+    # logging.shutdown 按创建的逆序关闭 handler
+    logging.shutdown(
+        [weakref.ref(i) for i in (*logger.handlers, logger._shutdown_hook)]
+    )
+    messages = [i.getMessage() for i in handler.records]
+    assert "ValueError: boom repeated 2 times" in messages[-2]
+    assert messages[-1].startswith("rate limit suppressed 2 records")
+
+    # 已经关闭的 handler 不会再收到汇总记录
+    logger.handlers[:] = [handler]
+    logger.exception("failed", exc_info=ValueError("boom"))
+    logger.exception("failed", exc_info=ValueError("boom"))
+    count = len(handler.records)
+    logger.flush_summaries()
+    assert len(handler.records) == count
+    logger.handlers.clear()
@@ -0,0 +1,48 @@
+import pytest
+
+from arkologger import (
+    Logger,
+    LoggerConfig,
+)
+from arkologger._ring import (
+    RingBufferIO,
+    read_ring_buffer,
+)
+
+
+def test_wrap_around(tmp_path):
+    ring = RingBufferIO(tmp_path / "debug.ring", 100)
+    for i in range(50):
+        ring.append(f"record {i}".encode())
+    ring.close()
+    records = list(read_ring_buffer(tmp_path / "debug.ring"))
+    assert records == [f"record {i}" for i in range(50 - len(records), 50)]
+
+
+def test_crash_while_overwriting(tmp_path, monkeypatch):
+    path = tmp_path / "debug.ring"
+    ring = RingBufferIO(path, 100)
+    for i in range(10):
+        ring.append(f"record {i}".encode())
+
+    def crash(position, data):
+        # 只写入了一半便崩溃
+        RingBufferIO._copy(ring, position, data[: len(data) // 2])
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ring, "_copy", crash)
+    with pytest.raises(KeyboardInterrupt):
+        ring.append(b"x" * 40)
+    ring._map.flush()
+    records = list(read_ring_buffer(path))
+    assert records
+    assert all(record.startswith("record ") for record in records)
+    ring._map.close()
+
+
+def test_reject_multiprocess(tmp_path):
+    config = LoggerConfig(
+        project_root=tmp_path, ring_buffer_size=1024, log_multiprocess=True
+    )
+    with pytest.raises(ValueError):
+        Logger(config)
@@ -0,0 +1,71 @@
+import pytest
+from pygments.lexers import PythonLexer
+
+from arkologger._source import SourceCache
+
+SOURCE = '''"""Docstring with \'\'\' inside.
+
+more
+"""
+import os
+
+s = \'\'\'
+y = """ not a string start
+\'\'\'
+
+
+def f():
+    x = 1
+    raise ValueError(x)
+'''
+
+
+def tokens_by_line(code, start_line):
+    """返回各行的 (token 类型, 文本) 列表, 键为行号"""
+    result = {}
+    line_no = start_line
+    for token_type, value in PythonLexer().get_tokens(code):
+        for index, part in enumerate(value.split("\\n")):
+            if index:
+                line_no += 1
+            if part:
+                result.setdefault(line_no, []).append((token_type, part))
+    return result
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / "module.py"
+    path.write_text(SOURCE, encoding="utf-8")
+    return str(path)
+
+
+@pytest.mark.parametrize("extra_lines", [0, 1, 2])
+def test_window_matches_full_file(source_file, extra_lines):
+    cache = SourceCache()
+    expected = tokens_by_line(SOURCE, 1)
+    line_count = SOURCE.count("\\n")
+    for line_no in range(1, line_count + 1):
+        window = cache.get_window(
+            source_file, line_no, extra_lines, lambda *_: "python"
+        )
+        actual = tokens_by_line(window.code, window.start_line)
+        first = max(1, line_no - extra_lines)
+        last = min(line_count, line_no + extra_lines)
+        for i in range(first, last + 1):
+            assert actual.get(i) == expected.get(i), (line_no, i)
+
+
+def test_window_starts_at_statement(source_file):
+    window = SourceCache().get_window(source_file, 14, 0, lambda *_: "python")
+    assert window.start_line == 14
+    # 不会在字符串的中间开始或结束
+    window = SourceCache().get_window(source_file, 8, 0, lambda *_: "python")
+    assert (window.start_line, window.code.count("\n")) == (7, 3)
+
+
+def test_invalid_source_uses_whole_file(tmp_path):
+    path = tmp_path / "broken.py"
+    path.write_text("x = (\\n1\\n2\\n3\\n", encoding="utf-8")
+    window = SourceCache().get_window(str(path), 3, 0, lambda *_: "python")
+    assert window.start_line == 1